@@ -0,0 +1,70 @@
+# APP FACTORY - Builds the Flask app and mounts bound-server + payment-system as blueprints
+#
+#   from app_factory import create_app
+#   app = create_app({'LICENSE_DB_DIR': '/var/lib/solpumpai'})
+#
+# gunicorn: gunicorn -c gunicorn.conf.py 'app_factory:create_app()'
+#
+# ONE gevent worker per LICENSE_DB_DIR: crash sessions, SSE subscribers and the round
+# broadcaster are in-process state. create_app() claims the directory (subsystems.claim_worker()),
+# so a second worker fails to boot. A process forked after create_app() gets JSON 503s.
+# A sync worker would be held by every open SSE stream - gunicorn.conf.py sets worker_class.
+
+import importlib.util
+import os
+import sys
+
+from flask import Flask, jsonify
+from flask_cors import CORS
+
+import subsystems
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_module(filename, name):
+    """Import one of our hyphen-named scripts (bound-server.py, payment-system.py) once"""
+    if name in sys.modules:
+        return sys.modules[name]
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)   # Their sibling imports (crash_sessions, ...) live here
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def check_worker():
+    """Before each request: a pid comparison, unless this process was forked after create_app()"""
+    if subsystems.holds_worker():
+        return None
+    try:
+        subsystems.claim_worker()
+    except subsystems.WorkerConflict as e:
+        return jsonify({'error': str(e)}), 503
+    return None
+
+
+def create_app(config=None):
+    """
+    Nothing heavy happens here: no Anthropic client, RPC session, database or
+    history files are opened until the first request that needs them.
+    Raises subsystems.WorkerConflict if another process already serves LICENSE_DB_DIR,
+    license_shards.LegacyNotMigrated if an old licenses.db sits next to existing shards.
+    """
+    app = Flask(__name__)
+    if config:
+        app.config.update(config)
+    subsystems.configure(**app.config)
+    subsystems.claim_worker()
+    subsystems.check_storage()
+    CORS(app)
+    app.before_request(check_worker)
+
+    bound_server = load_module('bound-server.py', 'bound_server')
+    payment_system = load_module('payment-system.py', 'payment_system')
+
+    app.register_blueprint(bound_server.bound)
+    app.register_blueprint(payment_system.payments)
+    return app
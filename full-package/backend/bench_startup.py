@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# STARTUP BENCHMARK - How fast does a fresh worker get to serving its first request?
+#
+#   python bench_startup.py              # 5 cold starts
+#   python bench_startup.py --runs 20 --json startup.json
+#
+# Measures, each in a fresh temp data dir, the way gunicorn.conf.py runs workers (preload_app = False:
+# the master never imports the app, each forked worker imports it and calls create_app() itself):
+#   fork_ms           os.fork() of a master that hasn't imported the app
+#   boot_ms           worker start → create_app() returned (imports included)
+#   first_request_ms  first request in that worker (lazy subsystems get built here)
+#   warm_request_ms   the same request again
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Unknown license key: goes all the way to the shard directory without needing real data
+PROBES = [
+    ('GET', '/api/payment-info', {}),
+    ('GET', '/api/license-status', {'X-License-Key': 'SOLPUMPAI-benchmark'}),
+]
+
+
+def boot_worker(config):
+    """Fork like the gunicorn master, then import + create_app() and time requests in the child"""
+    if 'app_factory' in sys.modules:
+        raise RuntimeError('The benchmark process must not import the app - workers would inherit it')
+    read_fd, write_fd = os.pipe()
+
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        booted = time.perf_counter()
+        fork_ms = (booted - started) * 1000
+        sys.path.insert(0, BACKEND_DIR)
+        from app_factory import create_app
+        import subsystems
+
+        app = create_app(config)
+        boot_ms = (time.perf_counter() - booted) * 1000
+        heavy = [m for m in ('anthropic', 'requests', 'numpy') if m in sys.modules]
+
+        client = app.test_client()
+        result = {'fork_ms': fork_ms, 'boot_ms': boot_ms, 'heavy_modules_loaded': heavy}
+        for method, path, headers in PROBES:
+            t0 = time.perf_counter()
+            client.open(path, method=method, headers=headers)
+            t1 = time.perf_counter()
+            client.open(path, method=method, headers=headers)
+            t2 = time.perf_counter()
+            result[path] = {'first_request_ms': (t1 - t0) * 1000, 'warm_request_ms': (t2 - t1) * 1000}
+        result['subsystems_started'] = subsystems.started()
+        os.write(write_fd, json.dumps(result).encode())
+        os._exit(0)
+
+    os.close(write_fd)
+    chunks = []
+    while True:
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    return json.loads(b''.join(chunks))
+
+
+def summarize(values):
+    return {
+        'median': round(statistics.median(values), 2),
+        'min': round(min(values), 2),
+        'max': round(max(values), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure worker start-up and first-request latency')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', metavar='PATH', help='Write the report here as JSON')
+    args = parser.parse_args()
+
+    boots, forks, heavy = [], [], set()
+    requests_ms = {path: {'first': [], 'warm': []} for _, path, _ in PROBES}
+    started = set()
+
+    for i in range(args.runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = {'LICENSE_DB_DIR': tmp, 'CRASH_HISTORY_DIR': os.path.join(tmp, 'crash_history')}
+            worker = boot_worker(config)
+            forks.append(worker['fork_ms'])
+            boots.append(worker['boot_ms'])
+            heavy.update(worker['heavy_modules_loaded'])
+            started.update(worker['subsystems_started'])
+            for _, path, _ in PROBES:
+                requests_ms[path]['first'].append(worker[path]['first_request_ms'])
+                requests_ms[path]['warm'].append(worker[path]['warm_request_ms'])
+
+    report = {
+        'runs': args.runs,
+        'fork_ms': summarize(forks),
+        'boot_ms': summarize(boots),
+        'heavy_modules_loaded_at_boot': sorted(heavy),
+        'requests': {path: {'first_request_ms': summarize(v['first']),
+                            'warm_request_ms': summarize(v['warm'])}
+                     for path, v in requests_ms.items()},
+        'subsystems_started_by_probes': sorted(started),
+    }
+
+    print(f"Startup benchmark ({args.runs} runs, medians)")
+    print(f"  fork:                {report['fork_ms']['median']:.2f} ms")
+    print(f"  import + create_app: {report['boot_ms']['median']:.1f} ms "
+          f"(heavy modules at boot: {', '.join(report['heavy_modules_loaded_at_boot']) or 'none'})")
+    for path, r in report['requests'].items():
+        print(f"  {path:<22} first {r['first_request_ms']['median']:.1f} ms, "
+              f"warm {r['warm_request_ms']['median']:.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,30 +2,44 @@
 # One wallet = One license (unique binding)
 # Re-verify token balance periodically
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import anthropic
-import os
+# Mounted as a blueprint by app_factory.create_app(); `python bound-server.py` still works
+
+from flask import Blueprint, Response, request, jsonify
+import hashlib
+import hmac
 import secrets
-import sqlite3
-import requests
+import threading
 import time
-import hashlib
+from crash_sessions import SessionStore, SessionOutOfSync, InvalidRounds, validate_rounds
+from event_hub import get_hub, license_topic, push_license_status, push_reverification
+from round_broadcaster import RoundBroadcaster, MODEL_TIERS, prediction_topic
+from rate_limit import RateLimiter
+import http_cache
+import prompt_builder
+from http_cache import json_response
+from license_shards import hash_wallet
+from subsystems import (get_claude_client, get_rpc_session, rpc_url, get_shards,
+                        get_history_store, get_stream_secret, metrics_token, register_schema,
+                        register_reset)
 
-app = Flask(__name__)
-CORS(app)
-
-CLAUDE_API_KEY = os.environ.get('CLAUDE_API_KEY')
-claude_client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+bound = Blueprint('bound', __name__)
 
 TOKEN_MINT = "C4br6g4CBAP2grzc2sUrU9wUN7eJGZZpePCN1yjapump"
 MINIMUM_TOKENS = 1000  # Lowered for testing
 REVERIFY_INTERVAL = 86400  # 24 hours
+STREAM_TOKEN_TTL = 300  # Seconds a stream token can open (or reopen) an SSE stream
 
-def init_db():
-    conn = sqlite3.connect('licenses.db')
-    c = conn.cursor()
-    
+# Per-license crash history (clients send only new rounds)
+crash_sessions = SessionStore()
+
+# Free round reports: one per finished round is plenty
+MAX_ROUNDS_PER_REPORT = 10
+round_reports = RateLimiter(limit=20, period=60)
+
+# Every observed round is persisted for analytics/backtesting: subsystems.get_history_store()
+# Licenses are spread over N SQLite files by wallet_hash: subsystems.get_shards()
+
+def create_tables(c):
     # License bound to wallet
     c.execute('''CREATE TABLE IF NOT EXISTS licenses
                  (license_key TEXT PRIMARY KEY, 
@@ -45,6 +59,12 @@ def init_db():
                   model TEXT, 
                   cost REAL)''')
     
+    # Token accounting - added later, so older shards get the columns here
+    columns = [row[1] for row in c.execute('PRAGMA table_info(usage)')]
+    for column in ('input_tokens', 'output_tokens', 'cache_read_tokens', 'cache_write_tokens'):
+        if column not in columns:
+            c.execute(f'ALTER TABLE usage ADD COLUMN {column} INTEGER DEFAULT 0')
+    
     # Verification log
     c.execute('''CREATE TABLE IF NOT EXISTS verification_log
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -52,23 +72,89 @@ def init_db():
                   timestamp INTEGER,
                   had_tokens INTEGER,
                   balance REAL)''')
-    
+
+# Runs against every shard when storage is first opened
+register_schema(create_tables)
+
+def broadcast_predict(model, multipliers):
+    """One shared prediction for the broadcaster - returns (analysis, cost)"""
+    response = get_claude_client().messages.create(
+        **prompt_builder.build_request(model, prompt_builder.encode_window(multipliers),
+                                       prompt_builder.window_stats(multipliers))
+    )
+    cost = estimate_cost(model, response.usage)
+    tokens = prompt_builder.usage_tokens(response.usage)
+    
+    # One license-less row per shared prediction (shard 0) so its tokens are counted once;
+    # the cost is charged on the per-delivery rows (cost_share), so it's 0 here
+    conn = get_shards().connect(0)
+    conn.execute('''INSERT INTO usage (license_key, wallet_address, timestamp, model, cost,
+                    input_tokens, output_tokens, cache_read_tokens, cache_write_tokens)
+                    VALUES (NULL, NULL, ?, ?, 0, ?, ?, ?, ?)''',
+                 (int(time.time()), model, tokens['input_tokens'], tokens['output_tokens'],
+                  tokens['cache_read_tokens'], tokens['cache_write_tokens']))
     conn.commit()
     conn.close()
+    
+    return response.content[0].text, cost
+
+# Shared-round mode: one prediction per round per tier, pushed over SSE
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+def get_broadcaster():
+    """Created on first use - it opens the history store"""
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                _broadcaster = RoundBroadcaster(get_history_store(), get_hub(), broadcast_predict)
+    return _broadcaster
+
+def reset_state():
+    """create_app() again: sessions and the broadcaster belong to the old app's settings"""
+    global crash_sessions, round_reports, _broadcaster
+    with _broadcaster_lock:
+        crash_sessions = SessionStore()
+        round_reports = RateLimiter(limit=20, period=60)
+        _broadcaster = None
 
-init_db()
+register_reset(reset_state)
 
-def hash_wallet(wallet_address):
-    """Create privacy-preserving hash of wallet address"""
-    return hashlib.sha256(wallet_address.encode()).hexdigest()[:16]
+def sign_stream_token(shard, rowid, expires):
+    """shard.rowid.expires.signature - points at the license row without containing the key"""
+    payload = f'{shard}.{rowid}.{expires}'
+    signature = hmac.new(get_stream_secret(), payload.encode(), hashlib.sha256).hexdigest()[:32]
+    return f'{payload}.{signature}'
+
+def stream_license_key():
+    """
+    License for an SSE request: X-License-Key header, or ?token= from /api/stream-token
+    (EventSource can't send headers, and a key in the URL would end up in access logs)
+    """
+    license_key = request.headers.get('X-License-Key')
+    if license_key:
+        return license_key
+    
+    parts = request.args.get('token', '').split('.')
+    if len(parts) != 4 or not all(p.isdigit() for p in parts[:3]):
+        return None
+    shard, rowid, expires = (int(p) for p in parts[:3])
+    if not hmac.compare_digest(sign_stream_token(shard, rowid, expires), '.'.join(parts)):
+        return None
+    if expires < time.time() or shard >= get_shards().shard_count:
+        return None
+    
+    conn = get_shards().connect(shard)
+    row = conn.execute('SELECT license_key FROM licenses WHERE rowid = ?', (rowid,)).fetchone()
+    conn.close()
+    return row[0] if row else None
 
 def check_token_balance(wallet_address):
     """
     Check Solana blockchain - does this wallet hold required tokens?
     NO WALLET CONNECTION - just reading public blockchain data
     """
-    rpc_url = "https://api.mainnet-beta.solana.com"
-    
     try:
         payload = {
             "jsonrpc": "2.0",
@@ -84,7 +170,7 @@ def check_token_balance(wallet_address):
         print(f"[DEBUG] Checking balance for wallet: {wallet_address[:8]}...")
         print(f"[DEBUG] Looking for token mint: {TOKEN_MINT}")
         
-        response = requests.post(rpc_url, json=payload, timeout=10)
+        response = get_rpc_session().post(rpc_url(), json=payload, timeout=10)
         data = response.json()
         
         print(f"[DEBUG] RPC Response: {data}")
@@ -111,14 +197,14 @@ def check_token_balance(wallet_address):
 
 def log_verification(wallet_address, had_tokens, balance):
     """Log verification attempts for audit trail"""
-    conn = sqlite3.connect('licenses.db')
+    conn = get_shards().connect_for_wallet(wallet_address)
     c = conn.cursor()
     c.execute('INSERT INTO verification_log VALUES (NULL, ?, ?, ?, ?)',
               (wallet_address, int(time.time()), 1 if had_tokens else 0, balance))
     conn.commit()
     conn.close()
 
-@app.route('/api/get-license', methods=['POST'])
+@bound.route('/api/get-license', methods=['POST'])
 def get_license():
     """
     User provides ONLY wallet address (public, safe to share)
@@ -139,7 +225,7 @@ def get_license():
     print(f"[License] Request from {wallet_address[:8]}...")
     
     # Check if this wallet ALREADY has a license
-    conn = sqlite3.connect('licenses.db')
+    conn = get_shards().connect_for_wallet(wallet_address)
     c = conn.cursor()
     c.execute('SELECT license_key, calls_remaining, is_active, last_verified FROM licenses WHERE wallet_address = ?',
               (wallet_address,))
@@ -148,11 +234,16 @@ def get_license():
     if existing:
         license_key, calls_remaining, is_active, last_verified = existing
         
+        # Heal a directory entry lost between register() and the shard insert
+        if get_shards().shard_for_key(license_key) is None:
+            get_shards().register(license_key, hash_wallet(wallet_address))
+        
         # Check if we should re-verify (every 24h)
         if time.time() - last_verified > REVERIFY_INTERVAL:
             print(f"[License] Re-verifying token balance for {wallet_address[:8]}...")
             
             has_tokens = check_token_balance(wallet_address)
+            push_reverification(license_key, has_tokens)
             
             if not has_tokens:
                 # Tokens sold/transferred - DEACTIVATE license
@@ -160,6 +251,7 @@ def get_license():
                           (wallet_address,))
                 conn.commit()
                 conn.close()
+                push_license_status(license_key, calls_remaining, False)
                 
                 return jsonify({
                     'error': 'Token balance below minimum. Your license has been deactivated.',
@@ -172,6 +264,8 @@ def get_license():
             c.execute('UPDATE licenses SET last_verified = ?, is_active = 1 WHERE wallet_address = ?',
                       (int(time.time()), wallet_address))
             conn.commit()
+            if not is_active:
+                push_license_status(license_key, calls_remaining, True)
         
         conn.close()
         
@@ -213,6 +307,7 @@ def get_license():
     wallet_hash = hash_wallet(wallet_address)
     
     # Store the binding: wallet ↔ license (permanent)
+    get_shards().register(license_key, wallet_hash)
     c.execute('INSERT INTO licenses VALUES (?, ?, ?, ?, ?, ?, ?)',
               (license_key, wallet_address, wallet_hash, int(time.time()), 50, int(time.time()), 1))
     conn.commit()
@@ -229,7 +324,7 @@ def get_license():
         'important': 'This license is permanently bound to your wallet. Keep it safe!'
     })
 
-@app.route('/api/verify-license', methods=['POST'])
+@bound.route('/api/verify-license', methods=['POST'])
 def verify_license():
     """
     Extension calls this to verify license is still valid
@@ -241,7 +336,9 @@ def verify_license():
     if not license_key:
         return jsonify({'error': 'License key required'}), 401
     
-    conn = sqlite3.connect('licenses.db')
+    conn = get_shards().connect_for_key(license_key)
+    if conn is None:
+        return jsonify({'error': 'Invalid license key'}), 401
     c = conn.cursor()
     c.execute('SELECT wallet_address, is_active, calls_remaining, last_verified FROM licenses WHERE license_key = ?',
               (license_key,))
@@ -258,6 +355,7 @@ def verify_license():
         print(f"[Verify] Re-checking token balance for {wallet_address[:8]}...")
         
         has_tokens = check_token_balance(wallet_address)
+        push_reverification(license_key, has_tokens)
         
         if not has_tokens:
             # Deactivate
@@ -265,6 +363,7 @@ def verify_license():
                       (license_key,))
             conn.commit()
             conn.close()
+            push_license_status(license_key, calls_remaining, False)
             
             return jsonify({
                 'error': 'License deactivated: wallet no longer holds required tokens',
@@ -275,6 +374,8 @@ def verify_license():
         c.execute('UPDATE licenses SET last_verified = ?, is_active = 1 WHERE license_key = ?',
                   (int(time.time()), license_key))
         conn.commit()
+        if not is_active:
+            push_license_status(license_key, calls_remaining, True)
     
     conn.close()
     
@@ -290,7 +391,7 @@ def verify_license():
         'wallet': wallet_address[:8] + '...' + wallet_address[-4:]
     })
 
-@app.route('/api/analyze', methods=['POST'])
+@bound.route('/api/analyze', methods=['POST'])
 def analyze():
     """
     AI analysis endpoint - requires valid license
@@ -303,7 +404,9 @@ def analyze():
         return jsonify({'error': 'License key required'}), 401
     
     # Verify license and wallet
-    conn = sqlite3.connect('licenses.db')
+    conn = get_shards().connect_for_key(license_key)
+    if conn is None:
+        return jsonify({'error': 'Invalid license key'}), 401
     c = conn.cursor()
     c.execute('SELECT wallet_address, calls_remaining, is_active, last_verified FROM licenses WHERE license_key = ?',
               (license_key,))
@@ -317,10 +420,14 @@ def analyze():
     
     # Re-verify if needed
     if time.time() - last_verified > REVERIFY_INTERVAL:
-        if not check_token_balance(wallet_address):
+        has_tokens = check_token_balance(wallet_address)
+        push_reverification(license_key, has_tokens)
+        
+        if not has_tokens:
             c.execute('UPDATE licenses SET is_active = 0 WHERE license_key = ?', (license_key,))
             conn.commit()
             conn.close()
+            push_license_status(license_key, calls_remaining, False)
             return jsonify({'error': 'License deactivated: insufficient tokens'}), 403
         
         c.execute('UPDATE licenses SET last_verified = ? WHERE license_key = ?',
@@ -336,42 +443,67 @@ def analyze():
         return jsonify({'error': 'No calls remaining'}), 403
     
     # Process the AI request
-    data = request.json
-    crash_history = data.get('crashHistory', [])
+    # New clients send {"seq": n, "rounds": [...new rounds only...]}
+    # Old clients send {"crashHistory": [...last 50...]} which resets the session
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        conn.close()
+        return jsonify({'error': 'JSON body required'}), 400
+    
+    # Validate everything first - a bad round must not leave the session half updated
+    try:
+        new_rounds = validate_rounds(data.get('rounds', []) if 'rounds' in data
+                                     else data.get('crashHistory', []))
+    except InvalidRounds as e:
+        conn.close()
+        return jsonify({'error': f'Invalid rounds: {e}'}), 400
+    
+    session = crash_sessions.get(license_key)
+    
+    try:
+        with session.lock:
+            if 'rounds' in data:
+                session.append(new_rounds, data.get('seq', 0))
+            else:
+                session.reset(new_rounds)
+            
+            window_size = session.count
+            dataString = session.data_string()
+            features = session.features()
+            seq = session.seq
+    except SessionOutOfSync as e:
+        conn.close()
+        return jsonify({
+            'error': 'Crash history session out of sync - resend full crashHistory',
+            'resync': True,
+            'seq': e.server_seq
+        }), 409
+    
+    # New rounds are one vote towards the shared history - full resends don't vote
+    if 'rounds' in data and new_rounds:
+        get_broadcaster().report(license_key, new_rounds[-MAX_ROUNDS_PER_REPORT:])
     
     try:
         # Smart model routing
         model = "claude-haiku-4-5-20251001"
-        if len(crash_history) % 10 == 0:
+        if window_size % 10 == 0:
             model = "claude-sonnet-4-5-20250929"
         
-        # Build prompt
-        recent50 = crash_history[-50:]
-        dataString = ', '.join([f"{r['multiplier']:.2f}" for r in recent50])
-        
-        prompt = f"""Analyze crash game patterns: {dataString}
-
-Provide JSON prediction:
-{{
-  "shouldBet": true/false,
-  "targetMultiplier": 2.0,
-  "confidence": "HIGH"/"MEDIUM"/"LOW",
-  "probability2x": 0.65,
-  "reasoning": "brief explanation"
-}}"""
-        
-        response = claude_client.messages.create(
-            model=model,
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
+        response = get_claude_client().messages.create(
+            **prompt_builder.build_request(model, dataString, features)
         )
         
         # Track usage
         cost = estimate_cost(model, response.usage)
+        tokens = prompt_builder.usage_tokens(response.usage)
         
         # Log usage with wallet address
-        c.execute('INSERT INTO usage VALUES (NULL, ?, ?, ?, ?, ?)',
-                  (license_key, wallet_address, int(time.time()), model, cost))
+        c.execute('''INSERT INTO usage (license_key, wallet_address, timestamp, model, cost,
+                     input_tokens, output_tokens, cache_read_tokens, cache_write_tokens)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                  (license_key, wallet_address, int(time.time()), model, cost,
+                   tokens['input_tokens'], tokens['output_tokens'],
+                   tokens['cache_read_tokens'], tokens['cache_write_tokens']))
         
         # Deduct call
         c.execute('UPDATE licenses SET calls_remaining = calls_remaining - 1 WHERE license_key = ?',
@@ -383,19 +515,23 @@ Provide JSON prediction:
         
         conn.commit()
         conn.close()
+        push_license_status(license_key, calls_remaining, True)
         
-        return jsonify({
+        # Analysis text is the biggest body we send - compress, never cache
+        return json_response({
             'analysis': response.content[0].text,
             'model_used': model,
             'cost': cost,
-            'calls_remaining': calls_remaining
-        })
+            'tokens': tokens,
+            'calls_remaining': calls_remaining,
+            'seq': seq
+        }, cache_control='no-store', etag=False)
         
     except Exception as e:
         conn.close()
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'error': str(e), 'seq': seq}), 500
 
-@app.route('/api/license-status', methods=['GET'])
+@bound.route('/api/license-status', methods=['GET'])
 def license_status():
     """Get license status and usage stats"""
     
@@ -404,7 +540,9 @@ def license_status():
     if not license_key:
         return jsonify({'error': 'License key required'}), 401
     
-    conn = sqlite3.connect('licenses.db')
+    conn = get_shards().connect_for_key(license_key)
+    if conn is None:
+        return jsonify({'error': 'Invalid license key'}), 401
     c = conn.cursor()
     
     c.execute('SELECT wallet_address, calls_remaining, created_at, is_active FROM licenses WHERE license_key = ?',
@@ -418,23 +556,294 @@ def license_status():
     wallet_address, calls_remaining, created_at, is_active = result
     
     # Get usage stats
-    c.execute('SELECT COUNT(*), SUM(cost) FROM usage WHERE license_key = ?', (license_key,))
-    total_calls, total_cost = c.fetchone()
+    c.execute('SELECT COUNT(*), SUM(cost), SUM(input_tokens), SUM(output_tokens) FROM usage WHERE license_key = ?',
+              (license_key,))
+    total_calls, total_cost, total_input_tokens, total_output_tokens = c.fetchone()
     
     conn.close()
     
-    return jsonify({
+    return json_response({
         'wallet': wallet_address[:8] + '...' + wallet_address[-4:],
         'calls_remaining': calls_remaining,
         'total_calls': total_calls or 0,
         'total_cost': total_cost or 0,
+        'total_input_tokens': total_input_tokens or 0,
+        'total_output_tokens': total_output_tokens or 0,
         'created_at': created_at,
         'is_active': bool(is_active),
         'bound_to': 'This license is permanently bound to your wallet address'
     })
 
+@bound.route('/api/rounds', methods=['POST'])
+def report_rounds():
+    """
+    Broadcast mode: clients report finished rounds (free - no call deducted, rate limited)
+    A round counts once ROUND_QUORUM different licenses reported it;
+    each confirmed round triggers ONE prediction per subscribed tier for everyone
+    """
+    
+    license_key = request.headers.get('X-License-Key')
+    
+    if not license_key:
+        return jsonify({'error': 'License key required'}), 401
+    
+    conn = get_shards().connect_for_key(license_key)
+    if conn is None:
+        return jsonify({'error': 'Invalid license key'}), 401
+    c = conn.cursor()
+    c.execute('SELECT is_active FROM licenses WHERE license_key = ?', (license_key,))
+    result = c.fetchone()
+    conn.close()
+    
+    if not result:
+        return jsonify({'error': 'Invalid license key'}), 401
+    
+    if not result[0]:
+        return jsonify({'error': 'License deactivated'}), 403
+    
+    retry_after = round_reports.hit(license_key)
+    if retry_after:
+        return jsonify({'error': 'Too many round reports', 'retry_after': retry_after}), 429, \
+            {'Retry-After': str(retry_after)}
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON body required'}), 400
+    try:
+        rounds = validate_rounds(data.get('rounds', []))
+    except InvalidRounds as e:
+        return jsonify({'error': f'Invalid rounds: {e}'}), 400
+    if len(rounds) > MAX_ROUNDS_PER_REPORT:
+        return jsonify({'error': f'At most {MAX_ROUNDS_PER_REPORT} rounds per report'}), 400
+    
+    broadcaster = get_broadcaster()
+    added = broadcaster.report(license_key, rounds)
+    
+    return jsonify({
+        'added': added,
+        'pending': broadcaster.confirmations.pending_count(),
+        'total_rounds': len(get_history_store())
+    })
+
+@bound.route('/api/stream-token', methods=['POST'])
+def stream_token():
+    """Short-lived signed token for opening the SSE endpoints (?token=...)"""
+    
+    license_key = request.headers.get('X-License-Key')
+    
+    if not license_key:
+        return jsonify({'error': 'License key required'}), 401
+    
+    shard = get_shards().shard_for_key(license_key)
+    if shard is None:
+        return jsonify({'error': 'Invalid license key'}), 401
+    conn = get_shards().connect(shard)
+    c = conn.cursor()
+    c.execute('SELECT rowid, is_active FROM licenses WHERE license_key = ?', (license_key,))
+    result = c.fetchone()
+    conn.close()
+    
+    if not result:
+        return jsonify({'error': 'Invalid license key'}), 401
+    
+    rowid, is_active = result
+    
+    if not is_active:
+        return jsonify({'error': 'License deactivated'}), 403
+    
+    expires = int(time.time()) + STREAM_TOKEN_TTL
+    return jsonify({
+        'token': sign_stream_token(shard, rowid, expires),
+        'expires_in': STREAM_TOKEN_TTL
+    })
+
+@bound.route('/api/predictions/stream', methods=['GET'])
+def prediction_stream():
+    """
+    Broadcast mode: SSE stream of shared predictions for a model tier
+    One call is deducted per prediction actually delivered
+    EventSource can't send headers - pass ?token= from /api/stream-token
+    """
+    
+    license_key = stream_license_key()
+    tier = request.args.get('tier', 'fast')
+    
+    if not license_key:
+        return jsonify({'error': 'License key or valid stream token required'}), 401
+    
+    if tier not in MODEL_TIERS:
+        return jsonify({'error': 'Invalid tier', 'tiers': list(MODEL_TIERS)}), 400
+    
+    conn = get_shards().connect_for_key(license_key)
+    if conn is None:
+        return jsonify({'error': 'Invalid license key'}), 401
+    c = conn.cursor()
+    c.execute('SELECT wallet_address, calls_remaining, is_active FROM licenses WHERE license_key = ?',
+              (license_key,))
+    result = c.fetchone()
+    conn.close()
+    
+    if not result:
+        return jsonify({'error': 'Invalid license key'}), 401
+    
+    wallet_address, calls_remaining, is_active = result
+    
+    if not is_active:
+        return jsonify({'error': 'License deactivated'}), 403
+    
+    if calls_remaining <= 0:
+        return jsonify({'error': 'No calls remaining'}), 403
+    
+    def charge_delivery(event, data):
+        # Charge per delivered prediction - stop the stream when calls run out
+        conn = get_shards().connect_for_key(license_key)
+        c = conn.cursor()
+        c.execute('UPDATE licenses SET calls_remaining = calls_remaining - 1 '
+                  'WHERE license_key = ? AND calls_remaining > 0 AND is_active = 1',
+                  (license_key,))
+        if c.rowcount == 0:
+            conn.close()
+            return 'close', {'error': 'No calls remaining or license deactivated'}
+        
+        # Tokens belong to the shared prediction, not to any one delivery
+        c.execute('INSERT INTO usage (license_key, wallet_address, timestamp, model, cost) '
+                  'VALUES (?, ?, ?, ?, ?)',
+                  (license_key, wallet_address, int(time.time()), data['model_used'], data['cost_share']))
+        c.execute('SELECT calls_remaining FROM licenses WHERE license_key = ?', (license_key,))
+        remaining = c.fetchone()[0]
+        conn.commit()
+        conn.close()
+        push_license_status(license_key, remaining, True)
+        
+        return event, dict(data, calls_remaining=remaining)
+    
+    sub = get_hub().subscribe(prediction_topic(tier), owner=license_key)
+    print(f"[Broadcast] {license_key[:12]}... subscribed to {tier}")
+    
+    return Response(get_hub().stream(sub, on_event=charge_delivery),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bound.route('/api/license-events', methods=['GET'])
+def license_events():
+    """
+    SSE push channel replacing /api/verify-license and /api/license-status polling
+    Sends current status on connect, then only changes (+ cheap heartbeats)
+    EventSource can't send headers - pass ?token= from /api/stream-token
+    """
+    
+    license_key = stream_license_key()
+    
+    if not license_key:
+        return jsonify({'error': 'License key or valid stream token required'}), 401
+    
+    conn = get_shards().connect_for_key(license_key)
+    if conn is None:
+        return jsonify({'error': 'Invalid license key'}), 401
+    c = conn.cursor()
+    c.execute('SELECT calls_remaining, is_active FROM licenses WHERE license_key = ?',
+              (license_key,))
+    result = c.fetchone()
+    conn.close()
+    
+    if not result:
+        return jsonify({'error': 'Invalid license key'}), 401
+    
+    calls_remaining, is_active = result
+    last_status = {}
+    
+    def only_changes(event, data):
+        # Several writers may push the same numbers - forward real changes only
+        if event == 'status':
+            if data == last_status:
+                return None
+            last_status.clear()
+            last_status.update(data)
+        return event, data
+    
+    sub = get_hub().subscribe(license_topic(license_key), owner=license_key)
+    sub.put(('status', {'calls_remaining': calls_remaining, 'is_active': bool(is_active)}))
+    
+    return Response(get_hub().stream(sub, on_event=only_changes),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def metrics_denied():
+    """Metrics are for operators: off unless METRICS_TOKEN is set, then X-Metrics-Token must match"""
+    token = metrics_token()
+    if not token:
+        return jsonify({'error': 'Metrics disabled (set METRICS_TOKEN)'}), 404
+    if not hmac.compare_digest(request.headers.get('X-Metrics-Token', ''), token):
+        return jsonify({'error': 'Metrics token required'}), 401
+    return None
+
+@bound.route('/api/metrics/connections', methods=['GET'])
+def connection_metrics():
+    """Live SSE connection counts for monitoring"""
+    
+    denied = metrics_denied()
+    if denied:
+        return denied
+    
+    # Counters only - don't open the history store just to report that nothing happened
+    return jsonify({
+        'hub': get_hub().metrics(),
+        'broadcaster': _broadcaster.stats if _broadcaster is not None else None
+    })
+
+@bound.route('/api/metrics/http', methods=['GET'])
+def http_metrics():
+    """Bytes and CPU saved by ETags, precomputed bodies and compression"""
+    
+    denied = metrics_denied()
+    if denied:
+        return denied
+    
+    return jsonify(http_cache.metrics())
+
+@bound.route('/api/crash-history', methods=['GET'])
+def crash_history():
+    """Recent rounds from the server-side history store (analytics/backtesting)"""
+    
+    license_key = request.headers.get('X-License-Key')
+    
+    if not license_key:
+        return jsonify({'error': 'License key required'}), 401
+    
+    conn = get_shards().connect_for_key(license_key)
+    if conn is None:
+        return jsonify({'error': 'Invalid license key'}), 401
+    c = conn.cursor()
+    c.execute('SELECT is_active FROM licenses WHERE license_key = ?', (license_key,))
+    result = c.fetchone()
+    conn.close()
+    
+    if not result:
+        return jsonify({'error': 'Invalid license key'}), 401
+    
+    limit = min(request.args.get('limit', 500, type=int), 5000)
+    since = request.args.get('since', type=int)
+    
+    history_store = get_history_store()
+    if since is not None:
+        multipliers, timestamps = history_store.since(since, limit)
+    else:
+        multipliers, timestamps = history_store.window(limit)
+    
+    return json_response({
+        'total_rounds': len(history_store),
+        'rounds': len(multipliers),
+        'average': round(float(multipliers.mean()), 2) if len(multipliers) else 0,
+        'below_2x_ratio': round(float((multipliers < 2.0).mean()), 2) if len(multipliers) else 0,
+        'multipliers': [round(m, 2) for m in multipliers.tolist()],
+        'timestamps': timestamps.tolist()
+    })
+
 def estimate_cost(model, usage):
-    input_tokens = usage.input_tokens
+    # Cached prefix tokens bill at 10% (reads) / 125% (writes) of the input rate
+    cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+    cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    input_tokens = usage.input_tokens + cache_read * 0.1 + cache_write * 1.25
     output_tokens = usage.output_tokens
     
     if 'haiku' in model:
@@ -446,9 +855,16 @@ def estimate_cost(model, usage):
     return 0
 
 if __name__ == '__main__':
+    # This copy IS bound_server - otherwise create_app() would import the file a second time
+    # (second EventHub, SessionStore and schema registration) and this one would go unused
+    import sys
+    sys.modules['bound_server'] = sys.modules[__name__]
+    from app_factory import create_app, load_module
+    app = create_app()
     print("🚀 $SolPumpAI Bound License Server")
     print("   ✅ No wallet connection required")
     print("   ✅ License permanently bound to wallet address")
     print("   ✅ One wallet = One license")
     print("   ✅ Auto re-verification every 24h")
+    load_module('payment-system.py', 'payment_system').print_banner()
     app.run(host='0.0.0.0', port=5000)
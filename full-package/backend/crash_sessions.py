@@ -0,0 +1,164 @@
+# CRASH HISTORY SESSIONS - Per-license ring buffer of recent multipliers
+# Clients append only NEW rounds (delta + sequence number) instead of re-sending the last 50
+
+import math
+import threading
+import time
+from array import array
+
+from prompt_builder import compact_number
+
+SESSION_WINDOW = 50      # Same window analyze() has always used
+SESSION_TTL = 3600       # Drop sessions idle for 1 hour
+SWEEP_INTERVAL = 300     # How often to look for idle sessions
+
+
+class SessionOutOfSync(Exception):
+    """Client's sequence number doesn't match ours - client must resend full history"""
+
+    def __init__(self, server_seq):
+        super().__init__(f'Session out of sync (server seq {server_seq})')
+        self.server_seq = server_seq
+
+
+class InvalidRounds(ValueError):
+    """Request rounds aren't a list of {'multiplier': number >= 1.0, 'timestamp'?: number}"""
+
+
+def validate_rounds(rounds):
+    """Check every round before a session or the history store is touched"""
+    if not isinstance(rounds, list):
+        raise InvalidRounds('rounds must be a list')
+    for i, r in enumerate(rounds):
+        if not isinstance(r, dict):
+            raise InvalidRounds(f'round {i} must be an object')
+        try:
+            multiplier = float(r['multiplier'])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidRounds(f'round {i} has no numeric multiplier')
+        if not (math.isfinite(multiplier) and multiplier >= 1.0):
+            raise InvalidRounds(f'round {i} multiplier must be >= 1.0')
+        timestamp = r.get('timestamp')
+        if timestamp is not None and (isinstance(timestamp, bool) or not isinstance(timestamp, (int, float))):
+            raise InvalidRounds(f'round {i} timestamp must be a number')
+    return rounds
+
+
+class CrashSession:
+    """
+    Fixed-size ring buffer of the most recent multipliers for one license.
+    Keeps formatted strings and running stats up to date on append,
+    so building a prompt never re-parses the whole window.
+    """
+
+    def __init__(self, size=SESSION_WINDOW):
+        self.size = size
+        self.multipliers = array('d', [0.0] * size)
+        self.formatted = [''] * size
+        self.count = 0            # Rounds currently in the window (<= size)
+        self.head = 0             # Next slot to write
+        self.seq = 0              # Total rounds ever appended (client's ack number)
+        self.total = 0.0          # Running sum of multipliers in window
+        self.below_2x = 0         # Running count of rounds < 2.0x in window
+        self.last_seen = time.time()
+        self.lock = threading.Lock()
+        self._prompt_seq = -1
+        self._data_string = ''
+
+    def _push(self, multiplier):
+        if self.count == self.size:
+            # Evict oldest round from running stats
+            old = self.multipliers[self.head]
+            self.total -= old
+            if old < 2.0:
+                self.below_2x -= 1
+        else:
+            self.count += 1
+
+        self.multipliers[self.head] = multiplier
+        self.formatted[self.head] = compact_number(multiplier)
+        self.total += multiplier
+        if multiplier < 2.0:
+            self.below_2x += 1
+
+        self.head = (self.head + 1) % self.size
+        self.seq += 1
+
+    def append(self, rounds, client_seq):
+        """Append new rounds. client_seq must equal our seq or the client is out of sync."""
+        if client_seq != self.seq:
+            raise SessionOutOfSync(self.seq)
+        for r in rounds:
+            self._push(float(r['multiplier']))
+        self.last_seen = time.time()
+
+    def reset(self, rounds):
+        """Replace the window with a full history (legacy crashHistory / resync)"""
+        self.count = 0
+        self.head = 0
+        self.seq = 0
+        self.total = 0.0
+        self.below_2x = 0
+        self._prompt_seq = -1
+        for r in rounds[-self.size:]:
+            self._push(float(r['multiplier']))
+        self.last_seen = time.time()
+
+    def window(self):
+        """Multipliers oldest → newest"""
+        start = (self.head - self.count) % self.size
+        return [self.multipliers[(start + i) % self.size] for i in range(self.count)]
+
+    def data_string(self):
+        """Compact space-joined window (prompt_builder encoding), rebuilt only when new rounds arrived"""
+        if self._prompt_seq != self.seq:
+            start = (self.head - self.count) % self.size
+            self._data_string = ' '.join(self.formatted[(start + i) % self.size]
+                                          for i in range(self.count))
+            self._prompt_seq = self.seq
+        return self._data_string
+
+    def features(self):
+        """Incrementally maintained window stats"""
+        if not self.count:
+            return {'rounds': 0, 'average': 0, 'below_2x_ratio': 0}
+        return {
+            'rounds': self.count,
+            'average': round(self.total / self.count, 2),
+            'below_2x_ratio': round(self.below_2x / self.count, 2)
+        }
+
+
+class SessionStore:
+    """license_key → CrashSession, with idle expiry"""
+
+    def __init__(self, ttl=SESSION_TTL, window=SESSION_WINDOW):
+        self.ttl = ttl
+        self.window = window
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.last_sweep = time.time()
+
+    def get(self, license_key):
+        with self.lock:
+            self._maybe_sweep()
+            session = self.sessions.get(license_key)
+            if session is None:
+                session = CrashSession(self.window)
+                self.sessions[license_key] = session
+            return session
+
+    def drop(self, license_key):
+        with self.lock:
+            self.sessions.pop(license_key, None)
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now - self.last_sweep < SWEEP_INTERVAL:
+            return
+        self.last_sweep = now
+        expired = [k for k, s in self.sessions.items() if now - s.last_seen > self.ttl]
+        for k in expired:
+            del self.sessions[k]
+        if expired:
+            print(f"[Sessions] Expired {len(expired)} idle session(s)")
@@ -0,0 +1,187 @@
+# CRASH HISTORY STORE - Every observed round, kept on disk for analytics/backtesting
+# Two append-only memory-mapped columns: multiplier (float32) + timestamp in ms (int64)
+# A row is committed once its timestamp is non-zero, so a crash mid-append is recoverable
+# Appends take an flock on append.lock, so several processes can share one directory
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows - one process per directory
+    fcntl = None
+
+INITIAL_CAPACITY = 65536       # Rows preallocated per column (grows by doubling)
+DEDUP_WINDOW_MS = 2000         # Same multiplier within 2s = same round seen by another client
+FUTURE_TOLERANCE_MS = 1000     # Client clocks may run a little ahead (keep below DEDUP_WINDOW_MS)
+
+
+class CrashHistoryStore:
+    """
+    Append-only crash history backed by two memory-mapped files:
+        multipliers.f32  - float32 per round
+        timestamps.i64   - int64 milliseconds per round (0 = empty slot)
+    Timestamps are strictly increasing, so time-range queries are a binary search.
+    """
+
+    def __init__(self, directory, initial_capacity=INITIAL_CAPACITY):
+        self.directory = directory
+        self.mult_path = os.path.join(directory, 'multipliers.f32')
+        self.ts_path = os.path.join(directory, 'timestamps.i64')
+        self.lock_path = os.path.join(directory, 'append.lock')
+        self.lock = threading.Lock()
+        self._lock_fd = None
+        self._lock_pid = None
+        os.makedirs(directory, exist_ok=True)
+
+        with self._locked(sync=False):
+            capacity = initial_capacity
+            if os.path.exists(self.ts_path):
+                capacity = max(capacity, os.path.getsize(self.ts_path) // 8)
+            self._open(capacity)
+            self.count = self._recover()
+
+        print(f"[History] Loaded {self.count:,} rounds from {directory}")
+
+    def _open(self, capacity):
+        for path, itemsize in ((self.mult_path, 4), (self.ts_path, 8)):
+            with open(path, 'ab') as f:
+                if f.tell() < capacity * itemsize:
+                    f.truncate(capacity * itemsize)
+        self.capacity = capacity
+        self.multipliers = np.memmap(self.mult_path, dtype=np.float32, mode='r+', shape=(capacity,))
+        self.timestamps = np.memmap(self.ts_path, dtype=np.int64, mode='r+', shape=(capacity,))
+
+    @contextmanager
+    def _locked(self, sync=True):
+        """Thread lock + cross-process file lock, with our view of the tail brought up to date"""
+        with self.lock:
+            if fcntl is None:
+                if sync:
+                    self._sync_tail()
+                yield
+                return
+            # A forked child shares the parent's open file - flock needs its own
+            if self._lock_pid != os.getpid():
+                self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                self._lock_pid = os.getpid()
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                if sync:
+                    self._sync_tail()
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _sync_tail(self):
+        """Pick up rows (and file growth) appended by other processes since we last looked"""
+        capacity = os.path.getsize(self.ts_path) // 8
+        if capacity > self.capacity:
+            self._open(capacity)
+        while self.count < self.capacity and self.timestamps[self.count] != 0:
+            self.count += 1
+
+    def _recover(self):
+        """Find the committed tail: last non-zero timestamp, minus any torn rows"""
+        ts = self.timestamps
+        nonzero = np.flatnonzero(ts)
+        count = int(nonzero[-1]) + 1 if len(nonzero) else 0
+
+        # Pages can hit disk out of order - drop tail rows that aren't fully written
+        while count and not (ts[count - 1] > 0 and np.isfinite(self.multipliers[count - 1])
+                             and self.multipliers[count - 1] >= 1.0):
+            count -= 1
+        if count and count < len(nonzero):
+            print(f"[History] Recovered tail - discarded {len(nonzero) - count} torn row(s)")
+
+        # Anything left beyond the tail is garbage from the torn write
+        self.multipliers[count:] = 0
+        self.timestamps[count:] = 0
+        return count
+
+    def _grow(self):
+        self.flush()
+        self._open(self.capacity * 2)
+
+    def flush(self):
+        self.multipliers.flush()
+        self.timestamps.flush()
+
+    def __len__(self):
+        with self.lock:
+            self._sync_tail()
+            return self.count
+
+    def append(self, multiplier, timestamp_ms=None, dedup_before=None):
+        """
+        O(1) append. Returns False for duplicates and out-of-order rounds.
+        dedup_before: only rows below this index count as duplicates (see extend)
+        """
+        # 0 marks an empty slot, so rounds without a usable timestamp get server time;
+        # client clocks are clamped so one far-future round can't block every later append
+        now_ms = int(time.time() * 1000)
+        if not timestamp_ms or int(timestamp_ms) <= 0:
+            timestamp_ms = now_ms
+        timestamp_ms = min(int(timestamp_ms), now_ms + FUTURE_TOLERANCE_MS)
+        multiplier = float(multiplier)
+
+        if not (multiplier >= 1.0 and np.isfinite(multiplier)):
+            return False
+
+        with self._locked():
+            if self.count:
+                last_ts = int(self.timestamps[self.count - 1])
+                # Rows written before the clamp existed may sit in the future - order against now instead
+                if timestamp_ms <= min(last_ts, now_ms + FUTURE_TOLERANCE_MS) - DEDUP_WINDOW_MS:
+                    return False
+                # Another client already reported this round
+                i = self.count - 1 if dedup_before is None else min(self.count, dedup_before) - 1
+                while i >= 0 and timestamp_ms - self.timestamps[i] < DEDUP_WINDOW_MS:
+                    if abs(self.multipliers[i] - multiplier) < 0.01:
+                        return False
+                    i -= 1
+                timestamp_ms = max(timestamp_ms, last_ts + 1)
+
+            if self.count == self.capacity:
+                self._grow()
+
+            # Multiplier first, timestamp last - the timestamp commits the row
+            self.multipliers[self.count] = multiplier
+            self.timestamps[self.count] = timestamp_ms
+            self.count += 1
+            return True
+
+    def extend(self, rounds):
+        """
+        Append a list of {'multiplier', 'timestamp'} dicts, returns how many were new.
+        One batch is one client's consecutive rounds, so rounds in it are only
+        deduplicated against what was stored before - [1.0, 1.0] is two rounds.
+        """
+        added = 0
+        start = len(self)
+        for r in rounds:
+            if self.append(r['multiplier'], r.get('timestamp'), dedup_before=start):
+                added += 1
+        return added
+
+    def window(self, n):
+        """Last n rounds as zero-copy (multipliers, timestamps) views"""
+        with self.lock:
+            self._sync_tail()
+            end = self.count
+            start = max(0, end - n)
+            return self.multipliers[start:end], self.timestamps[start:end]
+
+    def since(self, timestamp_ms, limit=None):
+        """Rounds at or after timestamp_ms as zero-copy views"""
+        with self.lock:
+            self._sync_tail()
+            end = self.count
+            start = int(np.searchsorted(self.timestamps[:end], timestamp_ms, side='left'))
+            if limit is not None:
+                end = min(end, start + limit)
+            return self.multipliers[start:end], self.timestamps[start:end]
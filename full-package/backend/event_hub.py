@@ -0,0 +1,161 @@
+# EVENT HUB - Fan out server events to long-lived SSE connections
+# One hub, many topics; each connection is a small queue drained by its own response stream
+# Idle connections cost one Subscriber + one blocked greenlet - run under the gevent worker
+# (gunicorn.conf.py); with sync workers/threads every open stream holds a whole worker
+# get_hub() is the process-wide hub; bound-server and payment-system push license status through it
+
+import json
+import queue
+import threading
+import time
+
+import subsystems
+
+HEARTBEAT_INTERVAL = 15   # Seconds between keep-alive comments on idle streams
+SUBSCRIBER_BACKLOG = 20   # Events buffered per slow client before we drop it
+
+
+class Subscriber:
+    __slots__ = ('topic', 'owner', 'queue', 'closed', 'connected_at')
+
+    def __init__(self, topic, owner=None):
+        self.topic = topic
+        self.owner = owner          # e.g. license_key
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        self.closed = False
+        self.connected_at = time.time()
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Client isn't reading - cut it loose rather than buffer forever
+            self.closed = True
+
+
+class EventHub:
+    def __init__(self):
+        self.topics = {}
+        self.lock = threading.Lock()
+        self.counters = {
+            'connections': 0,
+            'peak_connections': 0,
+            'total_connections': 0,
+            'events_published': 0,
+            'events_sent': 0,
+            'heartbeats_sent': 0,
+            'dropped_slow': 0,
+        }
+
+    def subscribe(self, topic, owner=None):
+        sub = Subscriber(topic, owner)
+        with self.lock:
+            self.topics.setdefault(topic, set()).add(sub)
+            self.counters['connections'] += 1
+            self.counters['total_connections'] += 1
+            self.counters['peak_connections'] = max(self.counters['peak_connections'],
+                                                    self.counters['connections'])
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            subs = self.topics.get(sub.topic)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self.counters['connections'] -= 1
+                if sub.closed:
+                    self.counters['dropped_slow'] += 1
+                if not subs:
+                    del self.topics[sub.topic]
+        sub.closed = True
+
+    def subscriber_count(self, topic):
+        with self.lock:
+            return len(self.topics.get(topic, ()))
+
+    def publish(self, topic, event, data):
+        """Queue an event for every subscriber of topic, returns how many got it"""
+        with self.lock:
+            subs = list(self.topics.get(topic, ()))
+        for sub in subs:
+            sub.put((event, data))
+        self.counters['events_published'] += 1
+        return len(subs)
+
+    def metrics(self):
+        """Counters plus live connections per topic kind ('license', 'predictions', ...)"""
+        with self.lock:
+            by_kind = {}
+            for topic, subs in self.topics.items():
+                kind = topic.split(':', 1)[0]
+                by_kind[kind] = by_kind.get(kind, 0) + len(subs)
+            return dict(self.counters, topics=len(self.topics), connections_by_kind=by_kind)
+
+    def stream(self, sub, on_event=None, heartbeat=HEARTBEAT_INTERVAL):
+        """
+        Generator of SSE text for one subscriber.
+        on_event(event, data) may return None to skip, or (event, data) to send;
+        returning ('close', data) sends it and ends the stream.
+        """
+        try:
+            yield 'retry: 5000\n\n'
+            while not sub.closed:
+                try:
+                    event, data = sub.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    self.counters['heartbeats_sent'] += 1
+                    yield f': heartbeat {int(time.time())}\n\n'
+                    continue
+
+                if on_event:
+                    result = on_event(event, data)
+                    if result is None:
+                        continue
+                    event, data = result
+
+                self.counters['events_sent'] += 1
+                yield f'event: {event}\ndata: {json.dumps(data)}\n\n'
+                if event == 'close':
+                    break
+        finally:
+            self.unsubscribe(sub)
+
+
+# One hub per app, shared by every blueprint
+_hub = EventHub()
+
+
+def get_hub():
+    return _hub
+
+
+def _reset():
+    global _hub
+    _hub = EventHub()
+
+
+subsystems.register_reset(_reset)
+
+
+def license_topic(license_key):
+    return f'license:{license_key}'
+
+
+def push_license_status(license_key, calls_remaining, is_active):
+    """Push calls_remaining/is_active to anyone subscribed to this license"""
+    topic = license_topic(license_key)
+    if _hub.subscriber_count(topic):
+        _hub.publish(topic, 'status', {
+            'calls_remaining': calls_remaining,
+            'is_active': bool(is_active)
+        })
+
+
+def push_reverification(license_key, has_tokens):
+    """Push the result of a periodic token re-verification"""
+    topic = license_topic(license_key)
+    if _hub.subscriber_count(topic):
+        _hub.publish(topic, 'reverified', {
+            'had_tokens': has_tokens,
+            'verified_at': int(time.time())
+        })
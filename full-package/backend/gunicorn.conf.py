@@ -0,0 +1,22 @@
+# GUNICORN CONFIG - Production server for the Flask app
+#
+#   gunicorn -c gunicorn.conf.py 'app_factory:create_app()'
+#
+# One gevent worker: each request (SSE streams included) is a greenlet instead of a
+# thread or process, so thousands of idle /api/license-events connections cost a few KB
+# each and never starve the other endpoints. Needs: pip install gunicorn gevent
+# SQLite calls leave the hub for a thread pool (LICENSE_DB_THREADS, default 16), so
+# writes to different license shards overlap - python shard_bench.py measures it.
+#
+# Keep workers = 1 - crash sessions, SSE subscribers and the round broadcaster live in
+# process memory. A second worker fails to boot (create_app() -> subsystems.claim_worker()).
+
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = 1
+worker_class = 'gevent'       # gunicorn monkeypatches socket/threading/queue before loading the app
+worker_connections = 10000    # Concurrent connections (mostly idle streams) per worker
+timeout = 30                  # Worker heartbeat - async workers don't time out long requests
+keepalive = 75
+preload_app = False           # Import the app after monkeypatching, not before
@@ -0,0 +1,184 @@
+# HTTP CACHING - ETags/304s, precompressed static bodies, gzip/brotli negotiation
+# Polling clients mostly get the same body back; let them skip the download (and us the work)
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # Optional - gzip only without it
+    brotli = None
+
+MIN_COMPRESS_SIZE = 512   # Smaller bodies aren't worth the CPU / header overhead
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5        # Per-request (dynamic) bodies
+STATIC_BROTLI_QUALITY = 11  # Precomputed bodies are compressed once, so go all out
+
+stats_lock = threading.Lock()
+stats = {
+    'responses': 0,
+    'not_modified': 0,
+    'compressed': 0,
+    'precomputed_hits': 0,
+    'bytes_raw': 0,        # What we'd have sent without any of this
+    'bytes_sent': 0,
+    'cpu_ms_spent': 0.0,   # Serializing/hashing/compressing per request
+    'cpu_ms_saved': 0.0,   # Serialization skipped thanks to precomputed bodies (what jsonify would spend)
+}
+
+
+def _record(raw_size, sent_size, cpu_ms=0.0, cpu_saved_ms=0.0, not_modified=False,
+            compressed=False, precomputed=False):
+    with stats_lock:
+        stats['responses'] += 1
+        stats['bytes_raw'] += raw_size
+        stats['bytes_sent'] += sent_size
+        stats['cpu_ms_spent'] += cpu_ms
+        stats['cpu_ms_saved'] += cpu_saved_ms
+        if not_modified:
+            stats['not_modified'] += 1
+        if compressed:
+            stats['compressed'] += 1
+        if precomputed:
+            stats['precomputed_hits'] += 1
+
+
+def metrics():
+    """Totals plus per-request averages"""
+    with stats_lock:
+        result = dict(stats)
+    n = result['responses'] or 1
+    result['bytes_saved'] = result['bytes_raw'] - result['bytes_sent']
+    result['avg_bytes_saved_per_request'] = round(result['bytes_saved'] / n, 1)
+    result['avg_cpu_ms_per_request'] = round(result['cpu_ms_spent'] / n, 3)
+    result['avg_cpu_ms_saved_per_request'] = round(result['cpu_ms_saved'] / n, 3)
+    result['brotli_available'] = brotli is not None
+    return result
+
+
+def dump_json(payload):
+    """Stable serialization - same data, same bytes, same ETag"""
+    return json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+
+
+def make_etag(body, encoding=None):
+    """Strong ETag per representation: gzip/br bodies differ byte-wise, so their tags do too"""
+    digest = hashlib.sha1(body).hexdigest()[:20]
+    return f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+
+def _client_has(etag):
+    header = request.headers.get('If-None-Match', '')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Compare ignoring weak validators (W/"...") - proxies may weaken them
+    tags = [t.strip().removeprefix('W/') for t in header.split(',')]
+    return etag in tags
+
+
+def _pick_encoding(encodings):
+    """Best encoding the client accepts from what we have"""
+    accept = request.headers.get('Accept-Encoding', '').lower()
+    offered = {}
+    for part in accept.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip()] = q
+    for enc in ('br', 'gzip'):
+        if enc in encodings and offered.get(enc, 0) > 0:
+            return enc
+    return None
+
+
+def _compress(body, encoding, static=False):
+    if encoding == 'br':
+        return brotli.compress(body, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if static else GZIP_LEVEL, mtime=0)
+
+
+class PrecomputedResponse:
+    """JSON body serialized, hashed and compressed once at startup"""
+
+    def __init__(self, payload, cache_control='public, max-age=300'):
+        started = time.process_time()
+        self.body = dump_json(payload)
+        # Only serialization counts as saved per hit - a plain jsonify() never compressed
+        self.serialize_cpu_ms = (time.process_time() - started) * 1000
+        self.cache_control = cache_control
+        self.encoded = {}
+        self.etags = {None: make_etag(self.body)}
+        encodings = ['gzip'] + (['br'] if brotli else [])
+        for enc in encodings:
+            compressed = _compress(self.body, enc, static=True)
+            if len(compressed) < len(self.body):
+                self.encoded[enc] = compressed
+                self.etags[enc] = make_etag(self.body, enc)
+
+    def respond(self):
+        raw = len(self.body)
+        encoding = _pick_encoding(self.encoded)
+        etag = self.etags[encoding]
+        if _client_has(etag):
+            _record(raw, 0, cpu_saved_ms=self.serialize_cpu_ms, not_modified=True, precomputed=True)
+            return _not_modified(etag, self.cache_control)
+
+        body = self.encoded[encoding] if encoding else self.body
+        _record(raw, len(body), cpu_saved_ms=self.serialize_cpu_ms, compressed=bool(encoding),
+                precomputed=True)
+        return _build(body, etag, self.cache_control, encoding)
+
+
+def _not_modified(etag, cache_control):
+    resp = Response(status=304)
+    resp.headers['ETag'] = etag
+    resp.headers['Cache-Control'] = cache_control
+    resp.headers['Vary'] = 'Accept-Encoding'
+    return resp
+
+
+def _build(body, etag, cache_control, encoding, status=200):
+    resp = Response(body, status=status, mimetype='application/json')
+    if etag:
+        resp.headers['ETag'] = etag
+    resp.headers['Cache-Control'] = cache_control
+    resp.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    return resp
+
+
+def json_response(payload, status=200, cache_control='private, no-cache', etag=True):
+    """
+    jsonify() replacement for read endpoints:
+    ETag + If-None-Match → 304, and gzip/brotli for bodies over MIN_COMPRESS_SIZE
+    """
+    started = time.process_time()
+    body = dump_json(payload)
+    raw = len(body)
+
+    encoding = None
+    if raw >= MIN_COMPRESS_SIZE:
+        encoding = _pick_encoding(('br', 'gzip') if brotli else ('gzip',))
+    tag = make_etag(body, encoding) if etag and status == 200 else None
+
+    if tag and _client_has(tag):
+        _record(raw, 0, (time.process_time() - started) * 1000, not_modified=True)
+        return _not_modified(tag, cache_control)
+
+    if encoding:
+        body = _compress(body, encoding)
+
+    _record(raw, len(body), (time.process_time() - started) * 1000, compressed=bool(encoding))
+    return _build(body, tag, cache_control, encoding, status)
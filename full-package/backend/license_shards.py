@@ -0,0 +1,455 @@
+# SHARDED LICENSE STORAGE - Spread licenses over N SQLite files by wallet_hash
+# SQLite allows one writer per file; N shards = N independent write locks
+# Under gevent every SQLite call runs on a small pool of real threads (LICENSE_DB_THREADS),
+# so writes to different shards overlap instead of queueing on the one hub - see shard_bench.py
+#
+# Layout (in LICENSE_DB_DIR):
+#   license_directory.db   license_key → shard (written only when a license is created)
+#   licenses-00.db ...     licenses, usage, verification_log (+ payments) for that shard
+#
+# The old single licenses.db is migrated automatically the first time storage is opened,
+# as long as no shards exist yet. Next to existing shards the server refuses to start
+# until it's merged by hand (server must be stopped):
+#   python license_shards.py reshard --shards 4 --from-legacy licenses.db
+#   python license_shards.py reshard --shards 8
+# --from-legacy merges the old file with whatever the current shards already hold,
+# then moves it aside
+
+import argparse
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+SHARD_COUNT = int(os.environ.get('LICENSE_SHARDS', 4))
+DIRECTORY_CACHE_SIZE = 100000   # license_key → shard lookups kept in memory
+BUSY_TIMEOUT_MS = 5000
+DB_THREADS = int(os.environ.get('LICENSE_DB_THREADS', 16))   # 0 = run SQLite on the hub
+
+
+def hash_wallet(wallet_address):
+    """Create privacy-preserving hash of wallet address"""
+    return hashlib.sha256(wallet_address.encode()).hexdigest()[:16]
+
+
+def shard_path(directory, shard):
+    return os.path.join(directory, f'licenses-{shard:02d}.db')
+
+
+def existing_shards(directory):
+    return sorted(glob.glob(os.path.join(directory, 'licenses-[0-9][0-9].db')))
+
+
+class LegacyNotMigrated(RuntimeError):
+    """An old licenses.db sits next to live shards - its licenses would be invisible"""
+
+
+def check_legacy(directory, shard_count=None):
+    """
+    Raise LegacyNotMigrated if licenses.db and shards both exist (merging them can
+    conflict, so that's a manual step). Returns the legacy path if it can be migrated
+    automatically, else None.
+    """
+    legacy = os.path.join(directory, 'licenses.db')
+    if not os.path.exists(legacy):
+        return None
+    if existing_shards(directory):
+        raise LegacyNotMigrated(f"Unmigrated {legacy} next to existing shards - its licenses would not be "
+                                f"served. Stop the server and run: python license_shards.py reshard "
+                                f"--shards {shard_count or SHARD_COUNT} --from-legacy {legacy}")
+    return legacy
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_write_gates = {}   # path → lock, one writer per file at a time (PooledConnection)
+
+
+def db_threadpool():
+    """
+    Thread pool for SQLite calls when gevent has patched threading (gunicorn gevent worker).
+    sqlite3 releases the GIL while it works, so pool threads on different shards really run
+    in parallel, and a shard waiting on its write lock or fsync no longer stalls every
+    greenlet. None outside gevent - then calls just block the calling thread as usual.
+    """
+    global _pool
+    monkey = sys.modules.get('gevent.monkey')
+    if not DB_THREADS or monkey is None or not monkey.is_module_patched('threading'):
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from gevent.threadpool import ThreadPool
+                _pool = ThreadPool(DB_THREADS)
+    return _pool
+
+
+class PooledCursor:
+    """sqlite3.Cursor whose blocking calls run on the DB thread pool"""
+
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self._connection = connection
+
+    def execute(self, sql, *args):
+        self._connection.begin_write(sql)
+        self._connection.run(self._cursor.execute, sql, *args)
+        return self
+
+    def executemany(self, sql, *args):
+        self._connection.begin_write(sql)
+        self._connection.run(self._cursor.executemany, sql, *args)
+        return self
+
+    def fetchone(self):
+        return self._connection.run(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._connection.run(self._cursor.fetchall)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):   # rowcount, lastrowid, description, ...
+        return getattr(self._cursor, name)
+
+
+class PooledConnection:
+    """
+    sqlite3.Connection whose blocking calls run on the DB thread pool.
+    Writers to one file queue on a per-file gate (a greenlet lock) before their first
+    write: left to SQLite's busy handler they'd wait inside pool threads, and with
+    every thread waiting the writer holding the lock couldn't get one to commit.
+    """
+
+    def __init__(self, conn, pool, gate):
+        self._conn = conn
+        self._pool = pool
+        self._gate = gate
+        self._writing = False
+
+    def run(self, func, *args):
+        return self._pool.apply(func, args)
+
+    def begin_write(self, sql):
+        if not self._writing and not sql.lstrip()[:6].upper() == 'SELECT':
+            self._gate.acquire()
+            self._writing = True
+
+    def end_write(self):
+        if self._writing:
+            self._writing = False
+            self._gate.release()
+
+    def cursor(self):
+        return PooledCursor(self._conn.cursor(), self)
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+    def commit(self):
+        try:
+            self.run(self._conn.commit)
+        finally:
+            self.end_write()
+
+    def close(self):
+        try:
+            self.run(self._conn.close)
+        finally:
+            self.end_write()
+
+    def __del__(self):
+        self.end_write()   # Dropped without close() on an error path
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _open(path, check_same_thread=True):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=check_same_thread)
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    return conn
+
+
+def connect_file(path):
+    pool = db_threadpool()
+    if pool is None:
+        return _open(path)
+    gate = _write_gates.get(path)
+    if gate is None:
+        with _pool_lock:
+            gate = _write_gates.setdefault(path, threading.Lock())
+    # One request uses its connection from whichever pool thread is free - never two at once
+    return PooledConnection(pool.apply(_open, (path, False)), pool, gate)
+
+
+class LicenseShards:
+    def __init__(self, directory='.', shard_count=None):
+        self.directory = directory
+        self.directory_path = os.path.join(directory, 'license_directory.db')
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.keepers = {}
+        os.makedirs(directory, exist_ok=True)
+
+        # Never serve (or issue licenses) beside an unmigrated licenses.db
+        legacy = check_legacy(directory, shard_count)
+        if legacy:
+            print(f"[Shards] Migrating {legacy} into {shard_count or SHARD_COUNT} shards...")
+            reshard(directory, shard_count or SHARD_COUNT, legacy)
+
+        conn = connect_file(self.directory_path)
+        conn.execute('''CREATE TABLE IF NOT EXISTS license_directory
+                        (license_key TEXT PRIMARY KEY,
+                         wallet_hash TEXT,
+                         shard INTEGER)''')
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        row = conn.execute("SELECT value FROM meta WHERE key = 'shard_count'").fetchone()
+        if row:
+            stored = int(row[0])
+            if shard_count and shard_count != stored:
+                print(f"[Shards] ⚠️ LICENSE_SHARDS={shard_count} but data has {stored} shards - "
+                      f"using {stored} (run license_shards.py reshard to change)")
+            self.shard_count = stored
+        else:
+            self.shard_count = shard_count or SHARD_COUNT
+            conn.execute("INSERT INTO meta VALUES ('shard_count', ?)", (str(self.shard_count),))
+        conn.commit()
+        conn.close()
+
+    def init_schema(self, create_tables):
+        """Run create_tables(cursor) against every shard; WAL so readers don't block the writer"""
+        for shard in range(self.shard_count):
+            conn = self.connect(shard)
+            conn.execute('PRAGMA journal_mode = WAL')
+            create_tables(conn.cursor())
+            conn.commit()
+            conn.close()
+
+            # Requests open and close their own connection; if that close is the file's last,
+            # SQLite checkpoints and deletes the WAL and the next open rebuilds it, with
+            # concurrent opens spinning in the busy handler meanwhile. One idle reader per
+            # shard for the life of the process keeps the WAL in place.
+            if shard not in self.keepers:
+                keeper = _open(shard_path(self.directory, shard), check_same_thread=False)
+                keeper.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+                self.keepers[shard] = keeper
+
+    def shard_for_hash(self, wallet_hash):
+        return int(wallet_hash, 16) % self.shard_count
+
+    def shard_for_wallet(self, wallet_address):
+        return self.shard_for_hash(hash_wallet(wallet_address))
+
+    def connect(self, shard):
+        return connect_file(shard_path(self.directory, shard))
+
+    def connect_for_wallet(self, wallet_address):
+        return self.connect(self.shard_for_wallet(wallet_address))
+
+    def shard_for_key(self, license_key):
+        """Directory lookup (cached - a license never moves outside of resharding)"""
+        shard = self.cache.get(license_key)
+        if shard is not None:
+            return shard
+
+        conn = connect_file(self.directory_path)
+        row = conn.execute('SELECT shard FROM license_directory WHERE license_key = ?',
+                           (license_key,)).fetchone()
+        conn.close()
+        if not row:
+            return None
+
+        with self.lock:
+            if len(self.cache) >= DIRECTORY_CACHE_SIZE:
+                self.cache.clear()
+            self.cache[license_key] = row[0]
+        return row[0]
+
+    def connect_for_key(self, license_key):
+        """Connection to the shard holding license_key, or None for unknown keys"""
+        shard = self.shard_for_key(license_key)
+        if shard is None:
+            return None
+        return self.connect(shard)
+
+    def register(self, license_key, wallet_hash):
+        """Record a new license in the directory, returns its shard"""
+        shard = self.shard_for_hash(wallet_hash)
+        conn = connect_file(self.directory_path)
+        conn.execute('INSERT OR REPLACE INTO license_directory VALUES (?, ?, ?)',
+                     (license_key, wallet_hash, shard))
+        conn.commit()
+        conn.close()
+        with self.lock:
+            self.cache[license_key] = shard
+        return shard
+
+
+def _copy_table(src, table, schema, targets, route):
+    """Copy every row of table from src into targets[route(row)]"""
+    columns = [r[1] for r in src.execute(f'PRAGMA table_info({table})')]
+    # AUTOINCREMENT ids from different source shards would collide - let the target renumber
+    keep = [c for c in columns if c != 'id']
+    placeholders = ', '.join('?' for _ in keep)
+    insert = f'INSERT INTO {table} ({", ".join(keep)}) VALUES ({placeholders})'
+
+    for conn in targets:
+        conn.execute(schema)
+        # Older sources may predate columns newer ones have (or the other way round)
+        existing = {r[1] for r in conn.execute(f'PRAGMA table_info({table})')}
+        for column in keep:
+            if column not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {column}')
+
+    copied = 0
+    for row in src.execute(f'SELECT {", ".join(keep)} FROM {table}'):
+        record = dict(zip(keep, row))
+        targets[route(record)].execute(insert, row)
+        copied += 1
+    return copied
+
+
+def reshard(directory, new_count, legacy_path=None):
+    """
+    Rebuild all shards (and the directory) with new_count shards.
+    legacy_path adds the old single-file licenses.db to the current shards.
+    Old files (legacy file included) are moved to a pre-reshard-<timestamp>-* folder, not deleted.
+    """
+    directory_path = os.path.join(directory, 'license_directory.db')
+
+    # Current shards first: they have the newest schema, legacy rows only fill in
+    sources = existing_shards(directory)
+    if legacy_path:
+        if not os.path.exists(legacy_path):
+            raise ValueError(f'{legacy_path} not found')
+        sources.append(legacy_path)
+
+    # Pass 1: licenses decide where everything else goes
+    key_shard = {}
+    key_hash = {}
+    wallet_key = {}
+    conflicts = []
+    for path in sources:
+        src = connect_file(path)
+        try:
+            rows = src.execute('SELECT license_key, wallet_address FROM licenses').fetchall()
+        except sqlite3.OperationalError:
+            rows = []   # Shard created but never used
+        src.close()
+        for license_key, wallet_address in rows:
+            # Merging legacy data into live shards: one wallet = one license must still hold
+            if license_key in key_shard or wallet_key.get(wallet_address, license_key) != license_key:
+                conflicts.append(f'{os.path.basename(path)}: {license_key[:16]}... / {wallet_address[:8]}...')
+                continue
+            wallet_key[wallet_address] = license_key
+            # Recompute rather than trust the stored column - routing must match hash_wallet()
+            wallet_hash = hash_wallet(wallet_address)
+            key_hash[license_key] = wallet_hash
+            key_shard[license_key] = int(wallet_hash, 16) % new_count
+
+    if conflicts:
+        raise ValueError(f"{len(conflicts)} license(s) exist in more than one source (same key, or a "
+                         f"wallet bound to two keys) - nothing was changed:\n  " + '\n  '.join(conflicts))
+
+    staging = os.path.join(directory, 'reshard-tmp')
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    targets = [connect_file(shard_path(staging, i)) for i in range(new_count)]
+    for conn in targets:
+        conn.execute('PRAGMA journal_mode = WAL')
+
+    def route(record):
+        if record.get('license_key') in key_shard:
+            return key_shard[record['license_key']]
+        if record.get('wallet_address'):
+            return int(hash_wallet(record['wallet_address']), 16) % new_count
+        return 0
+
+    # Pass 2: copy every table (licenses, usage, verification_log, payments, ...)
+    totals = {}
+    for path in sources:
+        src = connect_file(path)
+        tables = src.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table' "
+                             "AND name NOT LIKE 'sqlite_%' AND name != 'license_directory'").fetchall()
+        for table, schema in tables:
+            schema = schema.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1)
+            totals[table] = totals.get(table, 0) + _copy_table(src, table, schema, targets, route)
+        src.close()
+
+    for conn in targets:
+        conn.commit()
+        conn.close()
+
+    new_directory = connect_file(os.path.join(staging, 'license_directory.db'))
+    new_directory.execute('''CREATE TABLE license_directory
+                             (license_key TEXT PRIMARY KEY,
+                              wallet_hash TEXT,
+                              shard INTEGER)''')
+    new_directory.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+    new_directory.execute("INSERT INTO meta VALUES ('shard_count', ?)", (str(new_count),))
+    new_directory.executemany('INSERT INTO license_directory VALUES (?, ?, ?)',
+                              ((k, key_hash[k], s) for k, s in key_shard.items()))
+    new_directory.commit()
+    new_directory.close()
+
+    # Swap: move old files aside, move staged files in
+    backup = tempfile.mkdtemp(prefix=time.strftime('pre-reshard-%Y%m%d-%H%M%S-'), dir=directory)
+    old_files = [directory_path] + existing_shards(directory)
+    if legacy_path:
+        old_files.append(legacy_path)
+    for path in old_files:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                shutil.move(path + suffix, os.path.join(backup, os.path.basename(path + suffix)))
+    for name in os.listdir(staging):
+        shutil.move(os.path.join(staging, name), os.path.join(directory, name))
+    os.rmdir(staging)
+
+    print(f"[Shards] ✅ Resharded into {new_count} shards: " +
+          ', '.join(f'{t}={n}' for t, n in sorted(totals.items())))
+    print(f"[Shards] Old files kept in {backup}")
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='License shard maintenance (stop the server first)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('reshard', help='Redistribute all licenses over a new number of shards')
+    p.add_argument('--shards', type=int, required=True)
+    p.add_argument('--dir', default=os.environ.get('LICENSE_DB_DIR', '.'))
+    p.add_argument('--from-legacy', metavar='LICENSES_DB',
+                   help='Merge the old single-file licenses.db into the current shards')
+
+    p = sub.add_parser('info', help='Show licenses per shard')
+    p.add_argument('--dir', default=os.environ.get('LICENSE_DB_DIR', '.'))
+
+    args = parser.parse_args()
+
+    if args.command == 'reshard':
+        try:
+            reshard(args.dir, args.shards, args.from_legacy)
+        except ValueError as e:
+            print(f"[Shards] ❌ {e}")
+            raise SystemExit(1)
+    else:
+        shards = LicenseShards(args.dir)
+        for i in range(shards.shard_count):
+            conn = shards.connect(i)
+            try:
+                count = conn.execute('SELECT COUNT(*) FROM licenses').fetchone()[0]
+            except sqlite3.OperationalError:
+                count = 0
+            conn.close()
+            print(f"Shard {i:02d}: {count:,} licenses")
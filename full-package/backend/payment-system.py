@@ -1,10 +1,14 @@
 # TOKEN PAYMENT SYSTEM - Users burn $SolPumpAI tokens to buy API calls
 # Creates deflationary pressure & drives token demand
+# Mounted as a blueprint by app_factory.create_app()
 
-from flask import Flask, request, jsonify
-import sqlite3
-import requests
+from flask import Blueprint, request, jsonify
 import time
+from event_hub import push_license_status
+from http_cache import PrecomputedResponse
+from subsystems import get_rpc_session, rpc_url, get_shards, register_schema
+
+payments = Blueprint('payments', __name__)
 
 # Token economics
 BURN_RATES = {
@@ -22,7 +26,7 @@ def check_burn_transaction(wallet_address, expected_amount, recent_window=300):
     User sends tokens to burn wallet with memo: LICENSE_KEY
     """
     
-    rpc_url = "https://api.mainnet-beta.solana.com"
+    rpc = get_rpc_session()
     
     try:
         # Get recent transactions from user's wallet
@@ -36,7 +40,7 @@ def check_burn_transaction(wallet_address, expected_amount, recent_window=300):
             ]
         }
         
-        response = requests.post(rpc_url, json=payload, timeout=10)
+        response = rpc.post(rpc_url(), json=payload, timeout=10)
         signatures = response.json()['result']
         
         # Check each transaction
@@ -59,7 +63,7 @@ def check_burn_transaction(wallet_address, expected_amount, recent_window=300):
                 ]
             }
             
-            tx_response = requests.post(rpc_url, json=tx_payload, timeout=10)
+            tx_response = rpc.post(rpc_url(), json=tx_payload, timeout=10)
             tx_data = tx_response.json()['result']
             
             if not tx_data:
@@ -90,7 +94,7 @@ def check_burn_transaction(wallet_address, expected_amount, recent_window=300):
         print(f"[Payment] Error checking burn: {e}")
         return {'valid': False, 'error': str(e)}
 
-@app.route('/api/buy-calls', methods=['POST'])
+@payments.route('/api/buy-calls', methods=['POST'])
 def buy_calls():
     """
     User buys API calls by burning $SolPumpAI tokens
@@ -117,9 +121,11 @@ def buy_calls():
         return jsonify({'error': 'Invalid package'}), 400
     
     # Get license info
-    conn = sqlite3.connect('licenses.db')
+    conn = get_shards().connect_for_key(license_key)
+    if conn is None:
+        return jsonify({'error': 'Invalid license'}), 401
     c = conn.cursor()
-    c.execute('SELECT wallet_address, calls_remaining FROM licenses WHERE license_key = ?',
+    c.execute('SELECT wallet_address, calls_remaining, is_active FROM licenses WHERE license_key = ?',
               (license_key,))
     result = c.fetchone()
     
@@ -127,7 +133,7 @@ def buy_calls():
         conn.close()
         return jsonify({'error': 'Invalid license'}), 401
     
-    wallet_address, current_calls = result
+    wallet_address, current_calls, is_active = result
     
     # Get package details
     pkg = BURN_RATES[package]
@@ -167,6 +173,9 @@ def buy_calls():
     conn.commit()
     conn.close()
     
+    # Open /api/license-events streams learn about the new balance right away
+    push_license_status(license_key, new_total, is_active)
+    
     print(f"[Payment] ✅ Added {calls_to_add} calls. New total: {new_total}")
     
     return jsonify({
@@ -177,55 +186,55 @@ def buy_calls():
         'message': f'Successfully added {calls_to_add} API calls!'
     })
 
-@app.route('/api/payment-info', methods=['GET'])
+# Static - serialized, ETagged and gzip/brotli-compressed once at startup
+PAYMENT_INFO = PrecomputedResponse({
+    'packages': [
+        {
+            'id': 'small',
+            'name': '100 API Calls',
+            'tokens_required': 1000,
+            'calls': 100,
+            'price_per_call': 10,
+            'best_for': 'Casual users'
+        },
+        {
+            'id': 'medium',
+            'name': '600 API Calls',
+            'tokens_required': 5000,
+            'calls': 600,
+            'price_per_call': 8.33,
+            'discount': '17% off',
+            'best_for': 'Regular users',
+            'popular': True
+        },
+        {
+            'id': 'large',
+            'name': '1500 API Calls',
+            'tokens_required': 10000,
+            'calls': 1500,
+            'price_per_call': 6.67,
+            'discount': '33% off',
+            'best_for': 'Power users'
+        }
+    ],
+    'burn_wallet': BURN_WALLET,
+    'token_mint': TOKEN_MINT,
+    'instructions': [
+        'Select a package',
+        'Send tokens to burn wallet address',
+        'Submit transaction signature',
+        'Calls added instantly!'
+    ]
+}, cache_control='public, max-age=300')
+
+@payments.route('/api/payment-info', methods=['GET'])
 def payment_info():
     """Get pricing info for buying calls"""
     
-    return jsonify({
-        'packages': [
-            {
-                'id': 'small',
-                'name': '100 API Calls',
-                'tokens_required': 1000,
-                'calls': 100,
-                'price_per_call': 10,
-                'best_for': 'Casual users'
-            },
-            {
-                'id': 'medium',
-                'name': '600 API Calls',
-                'tokens_required': 5000,
-                'calls': 600,
-                'price_per_call': 8.33,
-                'discount': '17% off',
-                'best_for': 'Regular users',
-                'popular': True
-            },
-            {
-                'id': 'large',
-                'name': '1500 API Calls',
-                'tokens_required': 10000,
-                'calls': 1500,
-                'price_per_call': 6.67,
-                'discount': '33% off',
-                'best_for': 'Power users'
-            }
-        ],
-        'burn_wallet': BURN_WALLET,
-        'token_mint': TOKEN_MINT,
-        'instructions': [
-            'Select a package',
-            'Send tokens to burn wallet address',
-            'Submit transaction signature',
-            'Calls added instantly!'
-        ]
-    })
+    return PAYMENT_INFO.respond()
 
-# Add to database init
-def init_db_payments():
-    conn = sqlite3.connect('licenses.db')
-    c = conn.cursor()
-    
+# Payments live next to their license, in the same shard
+def create_payment_tables(c):
     c.execute('''CREATE TABLE IF NOT EXISTS payments
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
                   license_key TEXT,
@@ -235,12 +244,11 @@ def init_db_payments():
                   calls_added INTEGER,
                   tx_signature TEXT UNIQUE,
                   timestamp INTEGER)''')
-    
-    conn.commit()
-    conn.close()
 
-init_db_payments()
+register_schema(create_payment_tables)
+
+def print_banner():
+    print("💰 Token payment system loaded")
+    print(f"   Burn wallet: {BURN_WALLET}")
+    print(f"   Packages: 1K tokens = 100 calls, 5K = 600 calls, 10K = 1500 calls")
 
-print("💰 Token payment system loaded")
-print(f"   Burn wallet: {BURN_WALLET}")
-print(f"   Packages: 1K tokens = 100 calls, 5K = 600 calls, 10K = 1500 calls")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# PROMPT BENCH - Compare prompt variants for analyze(): tokens, payload size, build time, cost
+#
+#   python prompt_bench.py                          # offline, synthetic 50-round windows
+#   python prompt_bench.py --history crash_history  # offline, windows from the history store
+#   python prompt_bench.py --live --calls 3         # + exact token counts and real latency (CLAUDE_API_KEY)
+#   python prompt_bench.py --json prompt-report.json
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import types
+
+import prompt_builder
+
+MODELS = ['claude-haiku-4-5-20251001', 'claude-sonnet-4-5-20250929']
+
+VARIANTS = {
+    'legacy': lambda model, window: prompt_builder.build_legacy_request(model, window),
+    'compact': lambda model, window: prompt_builder.build_request(
+        model, prompt_builder.encode_window(window)),
+    'compact+stats': lambda model, window: prompt_builder.build_request(
+        model, prompt_builder.encode_window(window), prompt_builder.window_stats(window)),
+}
+
+
+def synthetic_windows(count, size, seed):
+    """Crash-like multipliers: heavy tail, ~1% instant busts"""
+    rng = random.Random(seed)
+    windows = []
+    for _ in range(count):
+        window = []
+        for _ in range(size):
+            u = rng.random()
+            window.append(1.0 if u < 0.01 else max(1.0, round(0.99 / (1 - u), 2)))
+        windows.append(window)
+    return windows
+
+
+def history_windows(directory, count, size):
+    from crash_store import CrashHistoryStore
+    store = CrashHistoryStore(directory)
+    multipliers, _ = store.window(count + size)
+    values = [round(m, 2) for m in multipliers.tolist()]
+    return [values[i:i + size] for i in range(0, max(0, len(values) - size) + 1)][:count]
+
+
+def request_text(kwargs):
+    parts = [block['text'] for block in kwargs.get('system', [])]
+    parts += [m['content'] for m in kwargs['messages']]
+    return '\n'.join(parts)
+
+
+def worst_case_cost(model, input_tokens, max_tokens):
+    """Cost if the model used its whole output budget (estimate_cost from bound-server.py)"""
+    from app_factory import load_module
+    bound_server = load_module('bound-server.py', 'bound_server')
+    usage = types.SimpleNamespace(input_tokens=input_tokens, output_tokens=max_tokens)
+    return bound_server.estimate_cost(model, usage)
+
+
+def offline(windows, model):
+    results = {}
+    for name, build in VARIANTS.items():
+        tokens, sizes, build_us = [], [], []
+        for window in windows:
+            started = time.perf_counter()
+            kwargs = build(model, window)
+            build_us.append((time.perf_counter() - started) * 1e6)
+            text = request_text(kwargs)
+            tokens.append(prompt_builder.estimate_tokens(text))
+            sizes.append(len(json.dumps(kwargs)))
+
+        est_tokens = statistics.mean(tokens)
+        results[name] = {
+            'est_input_tokens': round(est_tokens, 1),
+            'max_tokens': kwargs['max_tokens'],
+            'payload_bytes': round(statistics.mean(sizes), 1),
+            'build_us': round(statistics.median(build_us), 2),
+            'prefix_est_tokens': (prompt_builder.estimate_tokens(kwargs['system'][0]['text'])
+                                  if kwargs.get('system') else 0),
+            'cache_min_tokens': prompt_builder.cache_min_tokens(model),
+            'worst_case_cost': round(worst_case_cost(model, est_tokens, kwargs['max_tokens']), 8),
+        }
+    return results
+
+
+def live(windows, model, calls):
+    """Exact input tokens via count_tokens, plus a few real calls for latency/output size"""
+    import anthropic
+    client = anthropic.Anthropic(api_key=os.environ.get('CLAUDE_API_KEY'))
+    results = {}
+    for name, build in VARIANTS.items():
+        kwargs = build(model, windows[0])
+        counted = client.messages.count_tokens(
+            model=model, messages=kwargs['messages'],
+            **({'system': kwargs['system']} if 'system' in kwargs else {}))
+
+        latencies, outputs, cache_reads, valid = [], [], 0, 0
+        for window in windows[:calls]:
+            kwargs = build(model, window)
+            started = time.perf_counter()
+            response = client.messages.create(**kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            outputs.append(response.usage.output_tokens)
+            # Calls after the first reuse the prefix - non-zero only if upstream cached it
+            cache_reads += prompt_builder.usage_tokens(response.usage)['cache_read_tokens']
+            try:
+                json.loads(response.content[0].text)
+                valid += 1
+            except ValueError:
+                pass
+
+        results[name] = {
+            'input_tokens': counted.input_tokens,
+            'latency_ms_median': round(statistics.median(latencies), 1) if latencies else None,
+            'output_tokens_mean': round(statistics.mean(outputs), 1) if outputs else None,
+            'valid_json': f'{valid}/{len(outputs)}',
+            'cache_read_tokens': cache_reads,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare analyze() prompt variants')
+    parser.add_argument('--windows', type=int, default=200, help='How many windows to average over')
+    parser.add_argument('--size', type=int, default=50, help='Rounds per window')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--history', metavar='DIR', help='Use windows from a crash history store')
+    parser.add_argument('--model', action='append', help='Model(s) to compare (default: haiku + sonnet)')
+    parser.add_argument('--live', action='store_true', help='Also call the API (needs CLAUDE_API_KEY)')
+    parser.add_argument('--calls', type=int, default=3, help='Real calls per variant with --live')
+    parser.add_argument('--json', metavar='PATH', help='Write the report here as JSON')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    if args.history:
+        windows = history_windows(args.history, args.windows, args.size)
+    else:
+        windows = synthetic_windows(args.windows, args.size, args.seed)
+    if not windows:
+        print("No windows to test - history store is empty")
+        return
+
+    report = {'windows': len(windows), 'window_size': args.size, 'models': {}}
+    for model in args.model or MODELS:
+        report['models'][model] = {'offline': offline(windows, model)}
+        print(f"{model} ({len(windows)} windows of {args.size} rounds, token counts estimated)")
+        baseline = report['models'][model]['offline']['legacy']
+        for name, r in report['models'][model]['offline'].items():
+            change = r['est_input_tokens'] / baseline['est_input_tokens'] - 1
+            print(f"  {name:<14} ~{r['est_input_tokens']:>6.0f} in ({change:+.0%} vs legacy), "
+                  f"max_tokens {r['max_tokens']:>4}, {r['payload_bytes']:>6.0f} B, "
+                  f"build {r['build_us']:.1f} µs, worst case ${r['worst_case_cost']:.6f}, "
+                  f"cached prefix ~{r['prefix_est_tokens']} (upstream minimum {r['cache_min_tokens']})")
+
+        if args.live:
+            report['models'][model]['live'] = live(windows, model, args.calls)
+            for name, r in report['models'][model]['live'].items():
+                print(f"  live {name:<14} {r['input_tokens']} in, {r['output_tokens_mean']} out, "
+                      f"{r['latency_ms_median']} ms, valid JSON {r['valid_json']}, "
+                      f"cache reads {r['cache_read_tokens']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
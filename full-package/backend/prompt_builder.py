@@ -0,0 +1,114 @@
+# PROMPT BUILDER - Small, cache-friendly prompts for crash predictions
+# Static instructions first (cacheable prefix), per-request history last, output budget sized to the JSON
+
+import re
+
+# Everything that never changes between requests - keep it byte-for-byte stable
+SYSTEM_PREFIX = """Predict the next crash game round from recent crash multipliers (oldest first).
+Reply with only this JSON, no prose:
+{"shouldBet":bool,"targetMultiplier":num,"confidence":"HIGH|MEDIUM|LOW","probability2x":0-1,"reasoning":"max 20 words"}"""
+
+# ~25 tokens of keys/values + 20 words of reasoning, with headroom
+OUTPUT_BUDGET = 160
+
+# Legacy prompt settings, kept for comparison in prompt_bench.py
+LEGACY_MAX_TOKENS = 1000
+
+# Upstream only caches prefixes of at least this many (real) tokens - for reporting in
+# prompt_bench.py; requests always carry the marker and upstream decides
+CACHE_MIN_TOKENS = {
+    'claude-haiku-4-5': 4096,
+    'claude-sonnet-4-5': 1024,
+    'claude-opus-4-5': 4096,
+}
+
+
+def compact_number(multiplier):
+    """2 decimals without trailing zeros: 1.50 → 1.5, 2.00 → 2, 12.34 → 12.34"""
+    return f"{multiplier:.2f}".rstrip('0').rstrip('.')
+
+
+def encode_window(multipliers):
+    return ' '.join(compact_number(m) for m in multipliers)
+
+
+def window_stats(multipliers):
+    """Same numbers CrashSession.features() keeps incrementally, for callers without a session"""
+    if not multipliers:
+        return {'rounds': 0, 'average': 0, 'below_2x_ratio': 0}
+    return {
+        'rounds': len(multipliers),
+        'average': round(sum(multipliers) / len(multipliers), 2),
+        'below_2x_ratio': round(sum(1 for m in multipliers if m < 2.0) / len(multipliers), 2)
+    }
+
+
+def encode_stats(features):
+    return f"n={features['rounds']} avg={features['average']} below2x={features['below_2x_ratio']}"
+
+
+def estimate_tokens(text):
+    """
+    Offline token estimate: numbers split into digit groups, words, punctuation.
+    Good for comparing prompt variants, not for billing.
+    """
+    return len(re.findall(r"\d{1,3}|[A-Za-z]+|[^\sA-Za-z\d]", text))
+
+
+def cache_min_tokens(model):
+    for prefix, minimum in CACHE_MIN_TOKENS.items():
+        if model.startswith(prefix):
+            return minimum
+    return None
+
+
+def build_request(model, encoded_window, features=None):
+    """
+    kwargs for claude_client.messages.create().
+    encoded_window comes from encode_window() or CrashSession.data_string() (already compact).
+    features=None leaves the stats line out.
+    """
+    # Always marked: below the model's minimum upstream skips caching at no cost, and
+    # usage.cache_read_input_tokens shows when it's active - no local token guessing
+    system = {"type": "text", "text": SYSTEM_PREFIX, "cache_control": {"type": "ephemeral"}}
+
+    content = f"History: {encoded_window}"
+    if features is not None:
+        content += f"\nStats: {encode_stats(features)}"
+
+    return {
+        'model': model,
+        'max_tokens': OUTPUT_BUDGET,
+        'system': [system],
+        'messages': [{"role": "user", "content": content}]
+    }
+
+
+def build_legacy_request(model, multipliers):
+    """The original analyze() prompt - only used for comparisons"""
+    dataString = ', '.join(f"{m:.2f}" for m in multipliers)
+    prompt = f"""Analyze crash game patterns: {dataString}
+
+Provide JSON prediction:
+{{
+  "shouldBet": true/false,
+  "targetMultiplier": 2.0,
+  "confidence": "HIGH"/"MEDIUM"/"LOW",
+  "probability2x": 0.65,
+  "reasoning": "brief explanation"
+}}"""
+    return {
+        'model': model,
+        'max_tokens': LEGACY_MAX_TOKENS,
+        'messages': [{"role": "user", "content": prompt}]
+    }
+
+
+def usage_tokens(usage):
+    """Token counts from an API usage object (cache fields are missing on older SDKs)"""
+    return {
+        'input_tokens': usage.input_tokens,
+        'output_tokens': usage.output_tokens,
+        'cache_read_tokens': getattr(usage, 'cache_read_input_tokens', 0) or 0,
+        'cache_write_tokens': getattr(usage, 'cache_creation_input_tokens', 0) or 0,
+    }
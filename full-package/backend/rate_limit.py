@@ -0,0 +1,31 @@
+# RATE LIMITING - Fixed-window request limits per key (license), kept in process memory
+
+import threading
+import time
+
+SWEEP_SIZE = 10000   # Forget idle keys once this many are tracked
+
+
+class RateLimiter:
+    """At most `limit` hits per `period` seconds for each key"""
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self.windows = {}           # key -> [window_start, hits]
+        self.lock = threading.Lock()
+
+    def hit(self, key):
+        """Count one request, returns 0 if allowed or the seconds until the key may retry"""
+        now = time.time()
+        with self.lock:
+            if len(self.windows) >= SWEEP_SIZE:
+                self.windows = {k: w for k, w in self.windows.items() if now - w[0] < self.period}
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                self.windows[key] = [now, 1]
+                return 0
+            if window[1] >= self.limit:
+                return max(1, int(window[0] + self.period - now + 0.999))
+            window[1] += 1
+            return 0
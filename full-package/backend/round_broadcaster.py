@@ -0,0 +1,151 @@
+# ROUND BROADCASTER - One prediction per round per model tier, pushed to every subscriber
+# Upstream AI cost scales with rounds, not with the number of licensed users
+# Client-reported rounds only count once several licenses agree on them
+
+import os
+import threading
+import time
+
+# Model tiers clients can subscribe to
+MODEL_TIERS = {
+    'fast': 'claude-haiku-4-5-20251001',
+    'pro': 'claude-sonnet-4-5-20250929',
+}
+
+BROADCAST_WINDOW = 50   # Rounds fed to each prediction
+
+ROUND_QUORUM = int(os.environ.get('ROUND_QUORUM', 2))   # Distinct licenses that must report a round
+CONFIRM_WINDOW = 10     # Seconds between the first and last report of the same round
+MAX_PENDING = 1000      # Unconfirmed reports kept at most (oldest dropped first)
+
+
+def prediction_topic(tier):
+    return f'predictions:{tier}'
+
+
+class RoundConfirmations:
+    """
+    Votes on client-reported rounds. A round is confirmed once `quorum` different
+    licenses reported the same multiplier within `window` seconds of its first report,
+    so a single client can neither invent rounds nor decide what everyone gets billed for.
+    """
+
+    def __init__(self, quorum=ROUND_QUORUM, window=CONFIRM_WINDOW):
+        self.quorum = quorum
+        self.window = window
+        self.pending = []           # [multiplier, first_seen, reporters, confirmed]
+        self.lock = threading.Lock()
+
+    def vote(self, reporter, multipliers, now=None):
+        """Record one license's rounds, returns [(multiplier, first_seen)] that just reached quorum"""
+        now = time.time() if now is None else now
+        confirmed = []
+        with self.lock:
+            self.pending = [e for e in self.pending if now - e[1] <= self.window][-MAX_PENDING:]
+            for multiplier in multipliers:
+                # A reporter votes once per round - its repeats ([1.0, 1.0]) are separate rounds
+                entry = next((e for e in self.pending
+                              if abs(e[0] - multiplier) < 0.01 and reporter not in e[2]), None)
+                if entry is None:
+                    entry = [multiplier, now, set(), False]
+                    self.pending.append(entry)
+                entry[2].add(reporter)
+                if not entry[3] and len(entry[2]) >= self.quorum:
+                    entry[3] = True
+                    confirmed.append((entry[0], entry[1]))
+        return confirmed
+
+    def pending_count(self):
+        with self.lock:
+            return sum(1 for e in self.pending if not e[3])
+
+
+class RoundBroadcaster:
+    """
+    Rounds come in (confirmed client reports, or a trusted feed), land in the shared
+    history store once, and each tier with live subscribers gets exactly one prediction
+    for the newest round. Rounds that arrive while a prediction is running are coalesced
+    into the next one.
+    """
+
+    def __init__(self, store, hub, predict, quorum=ROUND_QUORUM):
+        self.store = store
+        self.hub = hub
+        self.predict = predict      # predict(model, multipliers) -> (analysis_text, cost)
+        self.confirmations = RoundConfirmations(quorum)
+        self.lock = threading.Lock()
+        self.running = set()        # Tiers with a prediction in flight
+        self.last_round = {}        # tier -> round number last predicted
+        self.stats = {'reported': 0, 'rounds': 0, 'predictions': 0, 'deliveries': 0, 'errors': 0}
+
+    def report(self, reporter, rounds):
+        """
+        Untrusted rounds from one license (already validated). Only rounds enough
+        licenses agree on reach the store, stamped with the server time of their first report.
+        """
+        self.stats['reported'] += len(rounds)
+        confirmed = self.confirmations.vote(reporter, [float(r['multiplier']) for r in rounds])
+        if not confirmed:
+            return 0
+        return self.ingest([{'multiplier': m, 'timestamp': int(first_seen * 1000)}
+                            for m, first_seen in confirmed])
+
+    def ingest(self, rounds):
+        """Add trusted rounds to the store; kick off predictions if any were new"""
+        added = self.store.extend(rounds)
+        if added:
+            self.stats['rounds'] += added
+            for tier in MODEL_TIERS:
+                self._schedule(tier)
+        return added
+
+    def _schedule(self, tier):
+        if not self.hub.subscriber_count(prediction_topic(tier)):
+            return
+        with self.lock:
+            if tier in self.running:
+                return
+            self.running.add(tier)
+        threading.Thread(target=self._run, args=(tier,), daemon=True).start()
+
+    def _run(self, tier):
+        try:
+            while True:
+                round_number = len(self.store)
+                if self.last_round.get(tier) == round_number:
+                    break
+                self._predict_round(tier, round_number)
+                self.last_round[tier] = round_number
+        finally:
+            with self.lock:
+                self.running.discard(tier)
+        # A round may have slipped in between the last check and releasing the tier
+        if len(self.store) != self.last_round.get(tier):
+            self._schedule(tier)
+
+    def _predict_round(self, tier, round_number):
+        model = MODEL_TIERS[tier]
+        multipliers, _ = self.store.window(BROADCAST_WINDOW)
+        started = time.time()
+
+        try:
+            analysis, cost = self.predict(model, multipliers.tolist())
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[Broadcast] {tier} prediction failed for round {round_number}: {e}")
+            return
+
+        topic = prediction_topic(tier)
+        listeners = self.hub.subscriber_count(topic)
+        delivered = self.hub.publish(topic, 'prediction', {
+            'round': round_number,
+            'tier': tier,
+            'model_used': model,
+            'analysis': analysis,
+            # Upstream cost split across everyone who received it
+            'cost_share': cost / listeners if listeners else cost,
+            'latency_ms': int((time.time() - started) * 1000)
+        })
+        self.stats['predictions'] += 1
+        self.stats['deliveries'] += delivered
+        print(f"[Broadcast] Round {round_number} ({tier}) → {delivered} subscriber(s)")
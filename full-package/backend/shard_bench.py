@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# SHARD WRITE BENCHMARK - License writes/s against shard count, the way the gevent worker runs them
+#
+#   python shard_bench.py                        # 1, 2, 4, 8 shards, pooled vs on-the-hub
+#   python shard_bench.py --shards 1 4 16 --writers 128 --seconds 5 --json shards.json
+#   python shard_bench.py --dir /var/lib/solpumpai-bench   # measure the real disk, not /tmp
+#   python shard_bench.py --fsync-ms 1           # emulate a disk that takes 1 ms to flush a commit
+#
+# Each run gets a fresh data dir with --licenses licenses spread over the shards, then
+# --writers greenlets each do what /api/analyze does per call against random licenses
+# (UPDATE calls_remaining + INSERT usage, one commit). Reported per shard count:
+#   pooled   SQLite on the license_shards thread pool (LICENSE_DB_THREADS) - the server default
+#   inline   SQLite on the gevent hub (LICENSE_DB_THREADS=0) - every write waits for the last one
+#
+# Sharding pays off when commits wait on the disk: a shard flushing its WAL no longer holds up
+# the others. Where fsync returns from a write cache (many VMs) writes are CPU-bound and shard
+# count changes little - --fsync-ms adds a flush delay to each commit to show the disk-bound case.
+
+from gevent import monkey
+monkey.patch_all()   # Same as the gunicorn gevent worker, before anything else is imported
+
+import argparse
+import json
+import os
+import random
+import secrets
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import gevent
+
+
+def slow_commits(flush_ms):
+    """Make every SQLite commit take flush_ms longer, blocking its thread like a real fsync"""
+    import license_shards
+    sleep = monkey.get_original('time', 'sleep')
+
+    class SlowCommit(sqlite3.Connection):
+        def commit(self):
+            super().commit()
+            sleep(flush_ms / 1000)
+
+    def open_slow(path, check_same_thread=True):
+        conn = sqlite3.connect(path, timeout=license_shards.BUSY_TIMEOUT_MS / 1000,
+                               check_same_thread=check_same_thread, factory=SlowCommit)
+        conn.execute(f'PRAGMA busy_timeout = {license_shards.BUSY_TIMEOUT_MS}')
+        return conn
+
+    license_shards._open = open_slow
+
+
+def populate(shards, count):
+    """count licenses, routed by wallet like get_license() does, in one transaction per shard"""
+    import license_shards
+
+    per_shard = {}
+    keys = []
+    for i in range(count):
+        wallet = secrets.token_hex(20)
+        wallet_hash = license_shards.hash_wallet(wallet)
+        key = f'SOLPUMPAI-bench-{i}'
+        per_shard.setdefault(shards.shard_for_hash(wallet_hash), []).append(
+            (key, wallet, wallet_hash, int(time.time()), 10 ** 9, int(time.time()), 1))
+        keys.append((key, wallet_hash, shards.shard_for_hash(wallet_hash)))
+
+    for shard, rows in per_shard.items():
+        conn = shards.connect(shard)
+        conn.executemany('INSERT INTO licenses VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        conn.commit()
+        conn.close()
+    conn = license_shards.connect_file(shards.directory_path)
+    conn.executemany('INSERT INTO license_directory VALUES (?, ?, ?)', keys)
+    conn.commit()
+    conn.close()
+    return [key for key, _, _ in keys]
+
+
+def run(shard_count, threads, args):
+    import license_shards
+    from app_factory import load_module
+
+    license_shards.DB_THREADS = threads
+    create_tables = load_module('bound-server.py', 'bound_server').create_tables
+
+    root = tempfile.mkdtemp(prefix='shard-bench-', dir=args.dir)
+    try:
+        shards = license_shards.LicenseShards(root, shard_count)
+        shards.init_schema(create_tables)
+        keys = populate(shards, args.licenses)
+
+        writes = [0]
+        deadline = time.perf_counter() + args.seconds
+
+        def writer():
+            while time.perf_counter() < deadline:
+                key = random.choice(keys)
+                conn = shards.connect_for_key(key)
+                c = conn.cursor()
+                c.execute('INSERT INTO usage (license_key, wallet_address, timestamp, model, cost) '
+                          'VALUES (?, NULL, ?, ?, ?)', (key, int(time.time()), 'bench', 0.0))
+                c.execute('UPDATE licenses SET calls_remaining = calls_remaining - 1 WHERE license_key = ?',
+                          (key,))
+                conn.commit()
+                conn.close()
+                writes[0] += 1
+
+        started = time.perf_counter()
+        gevent.joinall([gevent.spawn(writer) for _ in range(args.writers)])
+        elapsed = time.perf_counter() - started
+        return writes[0] / elapsed
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure license writes/s against shard count under gevent')
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--writers', type=int, default=64, help='Concurrent greenlets (requests in flight)')
+    parser.add_argument('--licenses', type=int, default=2000)
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('LICENSE_DB_THREADS', 16)),
+                        help='DB thread pool size for the pooled runs')
+    parser.add_argument('--dir', help='Where to create the temp data dirs (default: system temp)')
+    parser.add_argument('--fsync-ms', type=float, default=0,
+                        help='Emulated flush time added to each commit (default: the disk as it is)')
+    parser.add_argument('--json', metavar='PATH', help='Write the report here as JSON')
+    args = parser.parse_args()
+
+    if args.fsync_ms:
+        slow_commits(args.fsync_ms)
+
+    results = []
+    for count in args.shards:
+        pooled = run(count, args.threads, args)
+        inline = run(count, 0, args)
+        results.append({'shards': count, 'pooled_writes_per_s': round(pooled), 'inline_writes_per_s': round(inline)})
+
+    base = results[0]['pooled_writes_per_s'] or 1
+    print(f"Shard write benchmark ({args.writers} writers, {args.seconds:g}s per run, {args.threads} DB threads"
+          + (f", +{args.fsync_ms:g} ms per commit)" if args.fsync_ms else ")"))
+    print(f"  {'shards':>6}  {'pooled w/s':>10}  {'vs first':>8}  {'inline w/s':>10}")
+    for r in results:
+        print(f"  {r['shards']:>6}  {r['pooled_writes_per_s']:>10,}  "
+              f"{r['pooled_writes_per_s'] / base:>7.2f}x  {r['inline_writes_per_s']:>10,}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'writers': args.writers, 'seconds': args.seconds, 'threads': args.threads,
+                       'fsync_ms': args.fsync_ms, 'results': results}, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+# LAZY SUBSYSTEMS - Clients and databases are created on first use, not at import
+# Keeps worker start-up cheap: anthropic, requests and numpy only load when a request needs them
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows - no cross-process guard
+    fcntl = None
+
+# Defaults come from the environment; create_app(config) overrides them
+settings = {
+    'CLAUDE_API_KEY': os.environ.get('CLAUDE_API_KEY'),
+    'LICENSE_DB_DIR': os.environ.get('LICENSE_DB_DIR', '.'),
+    'LICENSE_SHARDS': int(os.environ.get('LICENSE_SHARDS', 4)),
+    'CRASH_HISTORY_DIR': os.environ.get('CRASH_HISTORY_DIR', 'crash_history'),
+    'RPC_URL': os.environ.get('SOLANA_RPC_URL', 'https://api.mainnet-beta.solana.com'),
+    'STREAM_TOKEN_SECRET': os.environ.get('STREAM_TOKEN_SECRET'),
+    'METRICS_TOKEN': os.environ.get('METRICS_TOKEN'),   # Unset = /api/metrics/* disabled
+}
+
+_lock = threading.RLock()
+_instances = {}
+_schemas = []
+_resets = []   # Module-level state to rebuild when configure() starts a new app
+_worker = {}   # pid/fd of the server.lock this process holds
+
+
+class WorkerConflict(RuntimeError):
+    """Another server process already holds LICENSE_DB_DIR/server.lock"""
+
+
+def configure(**overrides):
+    """Apply settings and drop anything built with the old ones"""
+    with _lock:
+        settings.update({k: v for k, v in overrides.items() if k in settings})
+        _instances.clear()
+        release_worker()
+        for reset in _resets:
+            reset()
+
+
+def holds_worker():
+    return _worker.get('pid') == os.getpid()
+
+
+def claim_worker():
+    """
+    Crash sessions, SSE subscribers and the broadcaster live in process memory,
+    so exactly one server process may serve a LICENSE_DB_DIR. create_app() claims it,
+    so a second worker fails to boot instead of silently splitting sessions and streams
+    (scale with gevent, not workers). Raises WorkerConflict.
+    """
+    if holds_worker():
+        return
+    with _lock:
+        if holds_worker():
+            return
+        os.makedirs(settings['LICENSE_DB_DIR'], exist_ok=True)
+        path = os.path.join(settings['LICENSE_DB_DIR'], 'server.lock')
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                raise WorkerConflict(f"Another server process already serves {settings['LICENSE_DB_DIR']} - "
+                                   f"run a single worker (see gunicorn.conf.py)")
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        _worker.update(pid=os.getpid(), fd=fd)
+
+
+def release_worker():
+    with _lock:
+        if holds_worker():
+            os.close(_worker['fd'])   # Closing drops the flock
+        _worker.clear()
+
+
+def check_storage():
+    """Cheap start-up check: fail before serving if an old licenses.db can't be migrated on first open"""
+    from license_shards import check_legacy
+    check_legacy(settings['LICENSE_DB_DIR'], settings['LICENSE_SHARDS'])
+
+
+def register_schema(create_tables):
+    """create_tables(cursor) runs on every shard the first time storage is opened"""
+    if create_tables not in _schemas:
+        _schemas.append(create_tables)
+        with _lock:
+            if 'shards' in _instances:
+                _instances['shards'].init_schema(create_tables)
+
+
+def register_reset(reset):
+    """reset() runs on every configure() - for state a module keeps outside _instances"""
+    if reset not in _resets:
+        _resets.append(reset)
+
+
+def _get(name, build):
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = build()
+                _instances[name] = instance
+    return instance
+
+
+def get_claude_client():
+    def build():
+        import anthropic
+        return anthropic.Anthropic(api_key=settings['CLAUDE_API_KEY'])
+    return _get('claude', build)
+
+
+def get_rpc_session():
+    """Shared HTTP session for Solana RPC calls (keeps connections alive between checks)"""
+    def build():
+        import requests
+        return requests.Session()
+    return _get('rpc', build)
+
+
+def rpc_url():
+    return settings['RPC_URL']
+
+
+def metrics_token():
+    return settings['METRICS_TOKEN']
+
+
+def get_stream_secret():
+    """HMAC key for SSE stream tokens - random per process unless STREAM_TOKEN_SECRET is set"""
+    def build():
+        import secrets
+        configured = settings['STREAM_TOKEN_SECRET']
+        return configured.encode() if configured else secrets.token_bytes(32)
+    return _get('stream_secret', build)
+
+
+def get_shards():
+    def build():
+        from license_shards import LicenseShards
+        shards = LicenseShards(settings['LICENSE_DB_DIR'], settings['LICENSE_SHARDS'])
+        for create_tables in _schemas:
+            shards.init_schema(create_tables)
+        return shards
+    return _get('shards', build)
+
+
+def get_history_store():
+    def build():
+        from crash_store import CrashHistoryStore
+        return CrashHistoryStore(settings['CRASH_HISTORY_DIR'])
+    return _get('history', build)
+
+
+def started():
+    """Which subsystems exist so far (for the startup benchmark)"""
+    return sorted(_instances)
@@ -1,18 +1,45 @@
 #!/usr/bin/env python3
+# RPC TOOLS - Token balance check + multi-endpoint latency benchmark
+#
+#   python test_token_check.py                       # one getTokenAccountsByOwner call, raw JSON dump
+#   python test_token_check.py bench --local         # benchmark against a local stand-in RPC
+#   python test_token_check.py bench \
+#       --endpoint https://api.mainnet-beta.solana.com \
+#       --endpoint https://my-provider.example/rpc \
+#       --concurrency 8 --requests 50 --json rpc-report.json
 
-import requests
+import argparse
+import hashlib
 import json
+import math
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
 
 # Your wallet and token details
 WALLET_ADDRESS = "7yNfNADhnCikE4EquxEZjpEqHeSRQngP8RbRWmuAYWWx"
 TOKEN_MINT = "C4br6g4CBAP2grzc2sUrU9wUN7eJGZZpePCN1yjapump"
 
+DEFAULT_RPC = "https://api.mainnet-beta.solana.com"
+
+# The RPC methods the backend actually calls (bound-server.py, payment-system.py)
+METHODS = ['getTokenAccountsByOwner', 'getSignaturesForAddress', 'getTransaction']
+
+# Throttling is HTTP 429; some providers repeat it as the JSON-RPC error code. Solana's -32005
+# means the node is unhealthy/behind - an endpoint problem, so it counts as an error
+RATE_LIMIT_CODES = {429}
+
 def test_token_balance():
     print(f"Testing token balance for wallet: {WALLET_ADDRESS}")
     print(f"Looking for token mint: {TOKEN_MINT}")
     print("-" * 60)
     
-    rpc_url = "https://api.mainnet-beta.solana.com"
+    rpc_url = DEFAULT_RPC
     
     payload = {
         "jsonrpc": "2.0",
@@ -72,5 +99,252 @@ def test_token_balance():
     except Exception as e:
         print(f"❌ Error: {e}")
 
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def method_params(method, wallet, signature):
+    if method == 'getTokenAccountsByOwner':
+        return [wallet, {"mint": TOKEN_MINT}, {"encoding": "jsonParsed"}]
+    if method == 'getSignaturesForAddress':
+        return [wallet, {"limit": 20}]
+    if method == 'getTransaction':
+        return [signature, {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0}]
+    return []
+
+_local = threading.local()
+
+def rpc_call(endpoint, method, params, timeout):
+    """One call → (latency_ms, outcome, result) where outcome is ok / error / rate_limited"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+
+    payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+    started = time.perf_counter()
+    try:
+        response = session.post(endpoint, json=payload, timeout=timeout)
+        latency = (time.perf_counter() - started) * 1000
+        if response.status_code == 429:
+            return latency, 'rate_limited', None
+        # 403/5xx can carry any JSON body - never let one into the latency percentiles as 'ok'
+        if not response.ok:
+            return latency, 'error', None
+        data = response.json()
+    except Exception:
+        return (time.perf_counter() - started) * 1000, 'error', None
+
+    # Malformed bodies count as errors - one bad answer must not abort the whole run
+    if not isinstance(data, dict):
+        return latency, 'error', None
+    if 'error' in data:
+        error = data['error']
+        code = error.get('code') if isinstance(error, dict) else None
+        return latency, 'rate_limited' if code in RATE_LIMIT_CODES else 'error', None
+    return latency, 'ok', data.get('result')
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return None
+    k = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[k], 2)
+
+def run_workload(endpoint, method, params, count, concurrency, timeout):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: rpc_call(endpoint, method, params, timeout), range(count)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(r[0] for r in results if r[1] == 'ok')
+    errors = sum(1 for r in results if r[1] == 'error')
+    limited = sum(1 for r in results if r[1] == 'rate_limited')
+    return {
+        'requests': count,
+        'ok': len(latencies),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'throughput_rps': round(count / elapsed, 2) if elapsed else None,
+        'error_rate': round(errors / count, 4),
+        'rate_limit_rate': round(limited / count, 4),
+    }
+
+def fingerprint(result):
+    """Hash of a result with the volatile context (slot) removed"""
+    if isinstance(result, dict) and 'context' in result:
+        result = {k: v for k, v in result.items() if k != 'context'}
+    return hashlib.sha256(json.dumps(result, sort_keys=True).encode()).hexdigest()[:16]
+
+def check_consistency(endpoints, methods, wallet, signature, timeout):
+    """Same request to every endpoint - do they agree?"""
+    report = {}
+    for method in methods:
+        if method == 'getTransaction' and not signature:
+            continue
+        params = method_params(method, wallet, signature)
+        prints = {}
+        for endpoint in endpoints:
+            _, outcome, result = rpc_call(endpoint, method, params, timeout)
+            prints[endpoint] = fingerprint(result) if outcome == 'ok' else outcome
+        answers = [v for v in prints.values() if v not in ('error', 'rate_limited')]
+        report[method] = {
+            # One answer agrees with nobody - it takes two to call endpoints consistent
+            'consistent': len(answers) >= 2 and len(set(answers)) == 1,
+            'answered': len(answers),
+            'by_endpoint': prints,
+        }
+    return report
+
+def first_signature(endpoint, wallet, timeout):
+    """getTransaction needs a real signature - borrow the wallet's newest one"""
+    _, outcome, result = rpc_call(endpoint, 'getSignaturesForAddress', [wallet, {"limit": 1}], timeout)
+    if outcome == 'ok' and result:
+        return result[0]['signature']
+    return None
+
+# ---------------------------------------------------------------------------
+# Local stand-in RPC (no network, no rate limits you didn't ask for)
+# ---------------------------------------------------------------------------
+
+LOCAL_SIGNATURE = '5' * 88
+
+def local_result(method, wallet):
+    if method == 'getTokenAccountsByOwner':
+        return {"context": {"slot": random.randint(1, 10**9)}, "value": [{
+            "pubkey": "LocalTokenAccount1111111111111111111111111",
+            "account": {"data": {"parsed": {"info": {
+                "owner": wallet, "mint": TOKEN_MINT,
+                "tokenAmount": {"amount": "5000000000", "decimals": 6, "uiAmount": 5000.0}
+            }}}}
+        }]}
+    if method == 'getSignaturesForAddress':
+        return [{"signature": LOCAL_SIGNATURE, "blockTime": 1700000000, "err": None}]
+    if method == 'getTransaction':
+        return {"blockTime": 1700000000, "transaction": {"message": {"instructions": []}}}
+    return None
+
+def start_local_rpc(latency_ms, jitter_ms, rate_limit):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            # Headers and body go out in separate writes - don't let Nagle stall the body
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            time.sleep(max(0, random.gauss(latency_ms, jitter_ms)) / 1000)
+
+            status = 200
+            if random.random() < rate_limit:
+                status = 429
+                reply = {"jsonrpc": "2.0", "id": body.get('id'),
+                         "error": {"code": 429, "message": "Too many requests"}}
+            else:
+                wallet = (body.get('params') or [''])[0]
+                reply = {"jsonrpc": "2.0", "id": body.get('id'),
+                         "result": local_result(body.get('method'), wallet)}
+
+            data = json.dumps(reply).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def bench(args):
+    endpoints = list(args.endpoint or [])
+    server = None
+    if args.local:
+        server, url = start_local_rpc(args.local_latency, args.local_jitter, args.local_rate_limit)
+        endpoints.append(url)
+        print(f"Local stand-in RPC at {url}")
+    if not endpoints:
+        endpoints = [DEFAULT_RPC]
+
+    methods = args.methods.split(',') if args.methods else METHODS
+    print(f"Benchmarking {len(endpoints)} endpoint(s): {', '.join(methods)} "
+          f"× {args.requests} requests, concurrency {args.concurrency}")
+    print("-" * 60)
+
+    report = {
+        'generated_at': int(time.time()),
+        'wallet': args.wallet,
+        'concurrency': args.concurrency,
+        'requests_per_method': args.requests,
+        'endpoints': {},
+    }
+
+    signature = None
+    for endpoint in endpoints:
+        signature = signature or first_signature(endpoint, args.wallet, args.timeout)
+        results = {}
+        for method in methods:
+            if method == 'getTransaction' and not signature:
+                print(f"{endpoint} {method}: skipped (no signature for this wallet)")
+                continue
+            params = method_params(method, args.wallet, signature)
+            results[method] = stats = run_workload(endpoint, method, params, args.requests,
+                                                   args.concurrency, args.timeout)
+            print(f"{endpoint} {method}: p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms, "
+                  f"p99 {stats['p99_ms']} ms, {stats['throughput_rps']} req/s, "
+                  f"errors {stats['error_rate']:.1%}, rate-limited {stats['rate_limit_rate']:.1%}")
+        report['endpoints'][endpoint] = results
+
+    if len(endpoints) > 1:
+        print("-" * 60)
+        report['consistency'] = check_consistency(endpoints, methods, args.wallet, signature, args.timeout)
+        for method, result in report['consistency'].items():
+            if result['answered'] < 2:
+                verdict = f"⚠️ only {result['answered']} endpoint(s) answered - can't compare"
+            else:
+                verdict = '✅ consistent' if result['consistent'] else '❌ endpoints disagree'
+            print(f"{method}: {verdict}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+    if server:
+        server.shutdown()
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solana RPC token check and latency benchmark')
+    sub = parser.add_subparsers(dest='command')
+
+    sub.add_parser('check', help='One getTokenAccountsByOwner call with raw output (default)')
+
+    p = sub.add_parser('bench', help='Concurrent latency/throughput benchmark across endpoints')
+    p.add_argument('--endpoint', action='append', help='RPC URL (repeat for several)')
+    p.add_argument('--local', action='store_true', help='Also run against a local stand-in RPC')
+    p.add_argument('--local-latency', type=float, default=20, help='Stand-in mean latency (ms)')
+    p.add_argument('--local-jitter', type=float, default=5, help='Stand-in latency std dev (ms)')
+    p.add_argument('--local-rate-limit', type=float, default=0.0,
+                   help='Fraction of stand-in calls answered with a rate-limit error')
+    p.add_argument('--methods', help=f'Comma-separated subset of {",".join(METHODS)}')
+    p.add_argument('--wallet', default=WALLET_ADDRESS)
+    p.add_argument('--requests', type=int, default=50, help='Requests per method per endpoint')
+    p.add_argument('--concurrency', type=int, default=8)
+    p.add_argument('--timeout', type=float, default=10)
+    p.add_argument('--json', metavar='PATH', help='Write the report here as JSON')
+
+    args = parser.parse_args(argv)
+    if args.command == 'bench':
+        bench(args)
+    else:
+        test_token_balance()
+
 if __name__ == "__main__":
-    test_token_balance()
\ No newline at end of file
+    main()
@@ -8,6 +8,12 @@ class SolPumpAIAnalyzer {
     this.gameHistory = [];
     this.currentPrediction = null;
     this.backendURL = 'http://localhost:5000/api';
+    this.sessionSeq = null;        // Server's crash history sequence number (null = not synced)
+    this.lastSentTimestamp = 0;    // Newest round the server already has
+    this.predictionMode = 'analyze'; // 'analyze' = per-user calls, 'broadcast' = shared SSE predictions
+    this.predictionStream = null;
+    this.licenseStream = null;       // Server pushes license status changes (no polling)
+    this.callsRemaining = null;
     
     this.init();
   }
@@ -46,7 +52,10 @@ class SolPumpAIAnalyzer {
 
   async loadLicense() {
     try {
-      const result = await chrome.storage.local.get(['solpumpai_license']);
+      const result = await chrome.storage.local.get(['solpumpai_license', 'solpumpai_mode']);
+      if (result.solpumpai_mode) {
+        this.predictionMode = result.solpumpai_mode;
+      }
       if (result.solpumpai_license) {
         this.licenseKey = result.solpumpai_license;
         console.log('[SolPumpAI] License loaded');
@@ -76,6 +85,11 @@ class SolPumpAIAnalyzer {
       if (response.ok && data.valid) {
         this.isActive = true;
         console.log(`[SolPumpAI] License verified - ${data.calls_remaining} calls remaining`);
+        this.callsRemaining = data.calls_remaining;
+        this.openLicenseStream();
+        if (this.predictionMode === 'broadcast') {
+          this.openPredictionStream();
+        }
         return true;
       } else {
         console.error('[SolPumpAI] License verification failed:', data.error);
@@ -255,6 +269,12 @@ class SolPumpAIAnalyzer {
     
     console.log(`[SolPumpAI] Total games detected: ${this.gameHistory.length}`);
     
+    // Broadcast mode: just report the round, the server pushes the shared prediction
+    if (this.isActive && this.predictionMode === 'broadcast') {
+      this.reportRound(result);
+      return;
+    }
+    
     // Get AI prediction for next game
     if (this.isActive && this.gameHistory.length >= 3) {
       console.log('[SolPumpAI] Requesting AI prediction...');
@@ -275,53 +295,23 @@ class SolPumpAIAnalyzer {
     try {
       console.log('[SolPumpAI] Requesting AI prediction...');
       
-      const response = await fetch(`${this.backendURL}/analyze`, {
-        method: 'POST',
-        headers: {
-          'X-License-Key': this.licenseKey,
-          'Content-Type': 'application/json'
-        },
-        body: JSON.stringify({
-          crashHistory: this.gameHistory.slice(-50) // Send last 50 games
-        })
-      });
+      let response = await this.postAnalyze();
+      let data = await response.json();
 
-      const data = await response.json();
+      // Server lost our session (restart/expiry) - resend full history once
+      if (response.status === 409 && data.resync) {
+        console.log('[SolPumpAI] History session out of sync - resending full history');
+        this.sessionSeq = null;
+        response = await this.postAnalyze();
+        data = await response.json();
+      }
+
+      // No seq back means the server didn't take our rounds - resync next time
+      this.sessionSeq = typeof data.seq === 'number' ? data.seq : null;
       
       if (response.ok) {
         console.log('[SolPumpAI] AI prediction received');
-        
-        try {
-          const analysis = JSON.parse(data.analysis);
-          this.currentPrediction = {
-            shouldBet: analysis.shouldBet,
-            targetMultiplier: analysis.targetMultiplier,
-            confidence: analysis.confidence,
-            probability2x: analysis.probability2x,
-            reasoning: analysis.reasoning,
-            callsRemaining: data.calls_remaining
-          };
-        } catch (e) {
-          // Fallback if analysis isn't JSON
-          this.currentPrediction = {
-            shouldBet: false,
-            confidence: 'LOW',
-            reasoning: 'AI analysis error',
-            callsRemaining: data.calls_remaining
-          };
-        }
-        
-        // Save prediction to storage
-        chrome.storage.local.set({
-          solpumpai_prediction: this.currentPrediction
-        });
-        
-        // Notify popup if open
-        chrome.runtime.sendMessage({
-          type: 'PREDICTION_UPDATE',
-          prediction: this.currentPrediction
-        });
-        
+        this.applyPrediction(data);
       } else {
         console.error('[SolPumpAI] Prediction error:', data.error);
         if (data.error.includes('calls remaining')) {
@@ -329,10 +319,190 @@ class SolPumpAIAnalyzer {
         }
       }
     } catch (error) {
+      this.sessionSeq = null;
       console.error('[SolPumpAI] Prediction request failed:', error);
     }
   }
 
+  applyPrediction(data) {
+    try {
+      const analysis = JSON.parse(data.analysis);
+      this.currentPrediction = {
+        shouldBet: analysis.shouldBet,
+        targetMultiplier: analysis.targetMultiplier,
+        confidence: analysis.confidence,
+        probability2x: analysis.probability2x,
+        reasoning: analysis.reasoning,
+        callsRemaining: data.calls_remaining
+      };
+    } catch (e) {
+      // Fallback if analysis isn't JSON
+      this.currentPrediction = {
+        shouldBet: false,
+        confidence: 'LOW',
+        reasoning: 'AI analysis error',
+        callsRemaining: data.calls_remaining
+      };
+    }
+    
+    // Save prediction to storage
+    chrome.storage.local.set({
+      solpumpai_prediction: this.currentPrediction
+    });
+    
+    // Notify popup if open
+    chrome.runtime.sendMessage({
+      type: 'PREDICTION_UPDATE',
+      prediction: this.currentPrediction
+    });
+  }
+
+  async reportRound(round) {
+    try {
+      await fetch(`${this.backendURL}/rounds`, {
+        method: 'POST',
+        headers: {
+          'X-License-Key': this.licenseKey,
+          'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ rounds: [round] })
+      });
+    } catch (error) {
+      console.error('[SolPumpAI] Round report failed:', error);
+    }
+  }
+
+  async getStreamToken() {
+    // EventSource can't send headers - trade the license key for a short-lived URL token
+    const response = await fetch(`${this.backendURL}/stream-token`, {
+      method: 'POST',
+      headers: {
+        'X-License-Key': this.licenseKey,
+        'Content-Type': 'application/json'
+      }
+    });
+    const data = await response.json();
+    if (!response.ok) {
+      throw new Error(data.error);
+    }
+    return data.token;
+  }
+
+  async openEventStream(path, name) {
+    const licenseKey = this.licenseKey;
+    let token;
+    try {
+      token = await this.getStreamToken();
+    } catch (error) {
+      console.error(`[SolPumpAI] Could not open ${name}:`, error);
+      return null;
+    }
+    // License changed (or predictions stopped) while we waited for the token
+    if (licenseKey !== this.licenseKey || this[name]) return null;
+    if (name === 'predictionStream' && !this.isActive) return null;
+
+    const source = new EventSource(`${this.backendURL}/${path}${path.includes('?') ? '&' : '?'}token=${encodeURIComponent(token)}`);
+    source.onerror = () => {
+      // Browser reconnects by itself; once the token has expired it gives up - reopen with a fresh one
+      if (source.readyState === EventSource.CLOSED && this[name] === source) {
+        this[name] = null;
+        // The license stream stays open while inactive - it's how we hear about purchases
+        setTimeout(() => {
+          if (name === 'licenseStream') {
+            this.openLicenseStream();
+          } else if (this.isActive) {
+            this.openPredictionStream();
+          }
+        }, 5000);
+      }
+    };
+    return source;
+  }
+
+  async openPredictionStream() {
+    if (this.predictionStream) return;
+
+    // One shared prediction per round - a call is deducted per prediction delivered
+    const source = await this.openEventStream('predictions/stream?tier=fast', 'predictionStream');
+    if (!source) return;
+    this.predictionStream = source;
+
+    this.predictionStream.addEventListener('prediction', (event) => {
+      console.log('[SolPumpAI] Shared prediction received');
+      this.applyPrediction(JSON.parse(event.data));
+    });
+
+    this.predictionStream.addEventListener('close', (event) => {
+      console.error('[SolPumpAI] Prediction stream closed:', JSON.parse(event.data).error);
+      this.closePredictionStream();
+      this.isActive = false;
+    });
+  }
+
+  async openLicenseStream() {
+    if (this.licenseStream) return;
+
+    const source = await this.openEventStream('license-events', 'licenseStream');
+    if (!source) return;
+    this.licenseStream = source;
+
+    this.licenseStream.addEventListener('status', (event) => {
+      const status = JSON.parse(event.data);
+      this.callsRemaining = status.calls_remaining;
+      this.isActive = status.is_active && status.calls_remaining > 0;
+      console.log(`[SolPumpAI] License status: ${status.calls_remaining} calls, active=${status.is_active}`);
+      if (!this.isActive) {
+        this.closePredictionStream();
+      } else if (this.predictionMode === 'broadcast' && !this.predictionStream) {
+        // Calls bought (or license reactivated) after the stream was closed
+        this.openPredictionStream();
+      }
+    });
+
+    this.licenseStream.addEventListener('reverified', (event) => {
+      const result = JSON.parse(event.data);
+      console.log(`[SolPumpAI] Token balance re-verified - holds tokens: ${result.had_tokens}`);
+    });
+  }
+
+  closeLicenseStream() {
+    if (this.licenseStream) {
+      this.licenseStream.close();
+      this.licenseStream = null;
+    }
+  }
+
+  closePredictionStream() {
+    if (this.predictionStream) {
+      this.predictionStream.close();
+      this.predictionStream = null;
+    }
+  }
+
+  postAnalyze() {
+    // Send only rounds the server hasn't seen yet; full window when not synced
+    const newest = this.gameHistory.length ? this.gameHistory[this.gameHistory.length - 1].timestamp : 0;
+    let body;
+    if (this.sessionSeq === null) {
+      body = { crashHistory: this.gameHistory.slice(-50) };
+    } else {
+      body = {
+        seq: this.sessionSeq,
+        rounds: this.gameHistory.filter(game => game.timestamp > this.lastSentTimestamp)
+      };
+    }
+    this.lastSentTimestamp = newest;
+
+    return fetch(`${this.backendURL}/analyze`, {
+      method: 'POST',
+      headers: {
+        'X-License-Key': this.licenseKey,
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify(body)
+    });
+  }
+
   async handleMessage(msg, sendResponse) {
     console.log('[SolPumpAI] Message received:', msg.action);
     
@@ -344,6 +514,7 @@ class SolPumpAIAnalyzer {
             onSolPump: this.isOnSolPump(),
             hasLicense: !!this.licenseKey,
             gamesDetected: this.gameHistory.length,
+            callsRemaining: this.callsRemaining,
             currentPrediction: this.currentPrediction
           };
           console.log('[SolPumpAI] Sending status:', status);
@@ -352,6 +523,9 @@ class SolPumpAIAnalyzer {
           
         case 'setLicense':
           this.licenseKey = msg.licenseKey;
+          this.sessionSeq = null;
+          this.closePredictionStream();
+          this.closeLicenseStream();
           await chrome.storage.local.set({
             solpumpai_license: this.licenseKey
           });